@@ -4,67 +4,91 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from dotenv import load_dotenv
+from .cache import PageCache, UserCache
+from .tuning import engine_options
 
 load_dotenv()
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
+page_cache = PageCache()
+user_cache = UserCache()
 
 def create_app():
     app = Flask(__name__)
+    # Derrière le proxy de Render : l'IP cliente vient de X-Forwarded-For (limiteur newsletter)
+    proxies = int(os.environ.get('TRUSTED_PROXIES', 0))
+    if proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///influencons.db')
     if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
         app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool de connexions dimensionné sur les workers gunicorn (voir tuning.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+    # Délai max avant qu'un worker voie une nouvelle version du contenu (ETag), voir counters.py
+    app.config['CONTENT_VERSION_TTL'] = float(os.environ.get('CONTENT_VERSION_TTL', 2))
 
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+    page_cache.init_app(app)
+    user_cache.init_app(app)
+
+    from . import images, newsletter, mailing, assets, freeze, compress, metrics
+    images.init_app(app)
+    newsletter.init_app(app)
+    mailing.init_app(app)
+    assets.init_app(app)
+    # Avant compress : les pages figées sans version précompressée restent compressées au vol
+    freeze.init_app(app)
+    compress.init_app(app)
+    metrics.init_app(app)
+
+    from .commands import release_command, create_admin_command
+    from .queries import check_indexes_command
+    from .counters import counters_cli
+    from .tuning import pool_check_command
+    from .search import search_cli
+    from .content import articles_cli
+    from .seed import seed_command
+    app.cli.add_command(release_command)
+    app.cli.add_command(create_admin_command)
+    app.cli.add_command(check_indexes_command)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(pool_check_command)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(articles_cli)
+    app.cli.add_command(seed_command)
 
     login_manager.login_view = 'admin.login'
     login_manager.login_message = 'Veuillez vous connecter pour accéder à cette page.'
 
-    from .models import User
+    from .models import User, UserIdentity
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Une lecture de la table users par TTL et par worker, pas par requête
+        # (copie ignorée si un utilisateur a été modifié depuis, dans n'importe quel worker)
+        user_id = int(user_id)
+        stamp = user_cache.stamp()
+        identity = user_cache.get(user_id, stamp)
+        if identity is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            identity = UserIdentity(user)
+            user_cache.set(user_id, identity, stamp)
+        return identity
 
     from .routes.main import main_bp
     from .routes.admin import admin_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
-    with app.app_context():
-        db.create_all()
-        # ── Migration colonnes manquantes ──
-        from sqlalchemy import text
-        try:
-            with db.engine.connect() as conn:
-                conn.execute(text("ALTER TABLE defis ADD COLUMN IF NOT EXISTS link VARCHAR(255)"))
-                conn.execute(text("ALTER TABLE defis ADD COLUMN IF NOT EXISTS image_url VARCHAR(255)"))
-                conn.execute(text("ALTER TABLE solidarite_action ADD COLUMN IF NOT EXISTS image_url VARCHAR(255)"))
-                conn.commit()
-        except Exception as e:
-            print(f"Migration: {e}")
-        _create_admin()
-
-    return app  # ← ici à la fin, pas avant !
-
-def _create_admin():
-    from .models import User
-    from werkzeug.security import generate_password_hash
-    admin_email = os.environ.get('ADMIN_EMAIL', 'admin@influencons.com')
-    admin_password = os.environ.get('ADMIN_PASSWORD', 'changeme123')
-    if not User.query.filter_by(email=admin_email).first():
-        admin = User(
-            username='Evelyne',
-            email=admin_email,
-            password=generate_password_hash(admin_password),
-            is_admin=True
-        )
-        db.session.add(admin)
-        db.session.commit()
+    return app
@@ -0,0 +1,174 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import mimetypes
+import urllib.request
+import click
+import brotli
+import rcssmin
+import rjsmin
+from flask import current_app, request, url_for, send_from_directory
+from flask.cli import AppGroup
+from .images import IMMUTABLE
+
+# ── ASSETS STATIQUES ──
+# `flask assets build` minifie les CSS/JS de static/, les écrit sous un nom
+# empreinté dans static/dist/ avec leurs versions .gz et .br, télécharge les
+# polices Google (servies ensuite depuis le site) et écrit un manifeste.
+# asset_url() / font_url() résolvent les noms empreintés ; sans build (en
+# local), les fichiers sources et les polices Google sont utilisés tels quels.
+BUNDLES = ('css/site.css', 'css/admin.css', 'css/base.css', 'js/site.js')
+
+FONTS = {
+    'site': 'https://fonts.googleapis.com/css2?family=Cormorant+Garamond:ital,wght@0,300;0,400;0,600;0,700;1,300;1,400;1,600&family=Jost:wght@200;300;400;500;600&display=swap',
+    'admin': 'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Cinzel:wght@400;600&display=swap',
+    'base': 'https://fonts.googleapis.com/css2?family=Playfair+Display:ital,wght@0,400;0,700;1,400&family=Cinzel:wght@400;600;700&family=Poppins:wght@300;400;600&display=swap',
+}
+# Jeux de caractères conservés (le français tient dans latin)
+FONT_SUBSETS = ('latin', 'latin-ext')
+# Google ne sert le woff2 qu'aux navigateurs récents
+FONT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+DIST = 'dist'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+
+
+def init_app(app):
+    app.config.setdefault('ASSETS_MANIFEST', os.path.join(app.static_folder, DIST, 'manifest.json'))
+    app.extensions['assets_manifest'] = load_manifest(app.config['ASSETS_MANIFEST'])
+    app.jinja_env.globals.update(asset_url=asset_url, font_url=font_url)
+    # Vue static enveloppée : versions précompressées et cache immuable pour dist/
+    static_view = app.view_functions['static']
+    app.view_functions['static'] = lambda filename: serve_static(static_view, filename)
+    app.cli.add_command(assets_cli)
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(path):
+    manifest = current_app.extensions['assets_manifest']
+    return url_for('static', filename=manifest.get(path, path))
+
+
+def font_url(name):
+    manifest = current_app.extensions['assets_manifest']
+    local = manifest.get(f'fonts/{name}.css')
+    return url_for('static', filename=local) if local else FONTS[name]
+
+
+def serve_static(static_view, filename):
+    if not filename.startswith(f'{DIST}/'):
+        return static_view(filename=filename)
+    folder = current_app.static_folder
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(folder, filename + suffix)):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(folder, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = static_view(filename=filename)
+    # Nom empreinté : le contenu ne change jamais pour une URL donnée
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# ── BUILD ──
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _fingerprint(path, data):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _emit(static_folder, path, data):
+    # Écrit dist/<path empreinté> et ses versions compressées ; renvoie le chemin relatif à static/
+    target = f'{DIST}/{_fingerprint(path, data)}'
+    full = os.path.join(static_folder, target)
+    _write(full, data)
+    if path.endswith(COMPRESSIBLE):
+        _write(full + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        _write(full + '.br', brotli.compress(data, quality=11))
+    return target
+
+
+def minify(path, text):
+    if path.endswith('.css'):
+        return rcssmin.cssmin(text)
+    if path.endswith('.js'):
+        return rjsmin.jsmin(text)
+    return text
+
+
+def _fetch(url):
+    req = urllib.request.Request(url, headers={'User-Agent': FONT_USER_AGENT})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return response.read()
+
+
+def vendor_fonts(static_folder, name, url):
+    # Feuille Google → @font-face locaux (woff2 empreintés, sous-ensembles FONT_SUBSETS)
+    css = _fetch(url).decode()
+    faces = []
+    for subset, face in re.findall(r'/\* ([\w-]+) \*/\s*(@font-face\s*{[^}]*})', css):
+        if subset not in FONT_SUBSETS:
+            continue
+        for remote in re.findall(r'url\((https://[^)]+)\)', face):
+            data = _fetch(remote)
+            local = _emit(static_folder, f'fonts/{os.path.basename(remote)}', data)
+            face = face.replace(remote, os.path.basename(local))
+        faces.append(face)
+    return _emit(static_folder, f'fonts/{name}.css', minify('.css', '\n'.join(faces)).encode())
+
+
+assets_cli = AppGroup('assets', help='CSS/JS empreintés, précompressés, polices locales.')
+
+
+@assets_cli.command('build')
+@click.option('--no-fonts', is_flag=True, help='Garder les polices Google (pas de téléchargement).')
+def build_command(no_fonts):
+    """Minifie et empreinte les assets, écrit les .gz/.br et le manifeste."""
+    from . import db, page_cache, counters
+    from sqlalchemy.exc import SQLAlchemyError
+    static_folder = current_app.static_folder
+    manifest = {}
+    for path in BUNDLES:
+        with open(os.path.join(static_folder, path), encoding='utf-8') as f:
+            source = f.read()
+        data = minify(path, source).encode()
+        manifest[path] = _emit(static_folder, path, data)
+        click.echo(f'{path} : {len(source.encode())} → {len(data)} octets ({manifest[path]})')
+    if not no_fonts:
+        for name, url in FONTS.items():
+            try:
+                manifest[f'fonts/{name}.css'] = vendor_fonts(static_folder, name, url)
+                click.echo(f'polices {name} : {manifest[f"fonts/{name}.css"]}')
+            except OSError as exc:
+                # Pas de réseau au build : les pages gardent le lien Google
+                click.echo(f'polices {name} : téléchargement impossible ({exc}), lien Google conservé', err=True)
+    _write(current_app.config['ASSETS_MANIFEST'], json.dumps(manifest, indent=2, sort_keys=True).encode())
+    current_app.extensions['assets_manifest'] = manifest
+    # Les pages en cache référencent les anciens noms
+    try:
+        counters.bump_version()
+    except SQLAlchemyError as exc:
+        # Base pas encore migrée au premier build : l'ETag suit aussi la date du gabarit
+        db.session.rollback()
+        click.echo(f'version du contenu inchangée ({exc.__class__.__name__})', err=True)
+    page_cache.clear()
+    click.echo(f'{len(manifest)} fichier(s) dans le manifeste.')
@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# ── CACHE DE PAGES ──
+# Stockage SQLite local : partagé entre les workers gunicorn d'une même
+# machine, sans Redis. Chaque entrée a une date d'expiration (TTL) et le
+# nombre d'entrées est borné (les plus anciennes sont évincées).
+# Le même fichier garde des tampons partagés par les workers de la machine
+# (table meta) ; la version du contenu public, elle, est en base (counters.py).
+class PageCache:
+    def __init__(self, app=None):
+        self.path = None
+        self.ttl = 0
+        self.max_entries = 0
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_PATH', os.environ.get(
+            'PAGE_CACHE_PATH', os.path.join(app.instance_path, 'page_cache.sqlite3')))
+        app.config.setdefault('PAGE_CACHE_TTL', int(os.environ.get('PAGE_CACHE_TTL', 300)))
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 128)))
+        self.path = app.config['PAGE_CACHE_PATH']
+        self.ttl = app.config['PAGE_CACHE_TTL']
+        self.max_entries = app.config['PAGE_CACHE_MAX_ENTRIES']
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        app.extensions['page_cache'] = self
+
+    @property
+    def enabled(self):
+        return bool(self.path) and self.ttl > 0
+
+    def _conn(self):
+        # Une connexion par thread et par process (jamais partagée après un fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL NOT NULL)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            row = self._conn().execute(
+                'SELECT value FROM entries WHERE key = ? AND expires > ?', (key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)',
+                (key, value, now + (ttl or self.ttl))
+            )
+            conn.execute('DELETE FROM entries WHERE expires <= ?', (now,))
+            conn.execute(
+                'DELETE FROM entries WHERE key IN ('
+                ' SELECT key FROM entries ORDER BY expires DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+        except sqlite3.Error:
+            pass
+
+    def delete(self, key):
+        if not self.enabled:
+            return
+        try:
+            self._conn().execute('DELETE FROM entries WHERE key = ?', (key,))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        if not self.enabled:
+            return
+        try:
+            self._conn().execute('DELETE FROM entries')
+        except sqlite3.Error:
+            pass
+
+    # ── TAMPONS PARTAGÉS ENTRE WORKERS ──
+    def version(self, name):
+        # Horodatage du dernier changement ; initialisé au premier appel
+        if not self.path:
+            return 0.0
+        try:
+            conn = self._conn()
+            row = conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                conn.execute('INSERT OR IGNORE INTO meta (name, value) VALUES (?, ?)', (name, time.time()))
+                row = conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        except sqlite3.Error:
+            return 0.0
+        return row[0]
+
+    def bump_version(self, name):
+        if not self.path:
+            return
+        try:
+            self._conn().execute(
+                'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, time.time())
+            )
+        except sqlite3.Error:
+            pass
+
+
+# ── CACHE DES UTILISATEURS CONNECTÉS ──
+# En mémoire, propre à chaque worker : évite de relire la table users à chaque
+# requête authentifiée (user_loader). LRU borné + TTL. Chaque entrée retient le
+# tampon 'users' (table meta du cache de pages) lu avant le chargement ; tout
+# commit modifiant un utilisateur change ce tampon, et les entrées plus anciennes
+# sont alors ignorées par tous les workers (droits admin retirés, compte supprimé).
+# Sans cache de pages (PAGE_CACHE_PATH vide), seul le TTL borne ce délai.
+USERS_STAMP = 'users'
+
+
+class UserCache:
+    def __init__(self, app=None):
+        self.ttl = 0
+        self.max_entries = 0
+        self.stamps = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_TTL', int(os.environ.get('USER_CACHE_TTL', 60)))
+        app.config.setdefault('USER_CACHE_MAX_ENTRIES', int(os.environ.get('USER_CACHE_MAX_ENTRIES', 64)))
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+        # Initialisé après page_cache (create_app)
+        self.stamps = app.extensions.get('page_cache')
+        app.extensions['user_cache'] = self
+
+    def stamp(self):
+        return self.stamps.version(USERS_STAMP) if self.stamps else 0.0
+
+    def get(self, user_id, stamp=None):
+        if stamp is None:
+            stamp = self.stamp()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            value, expires, seen = entry
+            if expires <= time.monotonic() or seen < stamp:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def set(self, user_id, value, stamp=None):
+        # stamp : tampon lu avant de charger l'utilisateur depuis la base
+        if self.ttl <= 0:
+            return
+        if stamp is None:
+            stamp = self.stamp()
+        with self._lock:
+            self._entries[user_id] = (value, time.monotonic() + self.ttl, stamp)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def changed(self):
+        # Après le commit d'une modification d'utilisateur : invalide les copies des autres workers
+        if self.stamps:
+            self.stamps.bump_version(USERS_STAMP)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
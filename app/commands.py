@@ -0,0 +1,52 @@
+import os
+import click
+from flask.cli import with_appcontext
+from flask_migrate import upgrade
+from werkzeug.security import generate_password_hash
+from . import db
+
+
+# ── DÉMARRAGE / DÉPLOIEMENT ──
+# Exécutés une seule fois par déploiement (et non à chaque démarrage de worker) :
+# importer wsgi:app ne fait aucun accès à la base.
+def create_admin():
+    from .models import User
+    admin_email = os.environ.get('ADMIN_EMAIL', 'admin@influencons.com')
+    admin_password = os.environ.get('ADMIN_PASSWORD', 'changeme123')
+    if User.query.filter_by(email=admin_email).first():
+        return False
+    admin = User(
+        username='Evelyne',
+        email=admin_email,
+        password=generate_password_hash(admin_password),
+        is_admin=True
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+
+@click.command('create-admin')
+@with_appcontext
+def create_admin_command():
+    """Crée le compte admin (ADMIN_EMAIL / ADMIN_PASSWORD) s'il n'existe pas."""
+    if create_admin():
+        click.echo('Compte admin créé.')
+    else:
+        click.echo('Compte admin déjà présent.')
+
+
+@click.command('release')
+@with_appcontext
+def release_command():
+    """Étape de déploiement : migrations (flask db upgrade), compte admin, rendu des articles, pages figées."""
+    from . import freeze, content
+    upgrade()
+    create_admin_command.callback()
+    # Articles jamais rendus (colonnes ajoutées par migration) ou rendus par une version précédente
+    rendered = content.render_articles()
+    if rendered:
+        click.echo(f'{rendered} article(s) rendu(s).')
+    if freeze.enabled():
+        # Templates et assets du nouveau déploiement
+        freeze.freeze_command.callback(force=True)
@@ -0,0 +1,145 @@
+import os
+import zlib
+import brotli
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+# ── COMPRESSION DES RÉPONSES ──
+# Gunicorn est servi directement (pas de proxy qui compresse) : middleware
+# WSGI brotli / gzip selon Accept-Encoding. Les réponses sous le seuil, déjà
+# encodées (assets précompressés de dist/) ou d'un type déjà compressé
+# (images, polices) passent telles quelles. Un corps à longueur connue est
+# compressé d'un bloc (Content-Length recalculé) ; un corps en flux (export
+# CSV) est compressé au fil de l'eau.
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+)
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_ENABLED', os.environ.get('COMPRESS_ENABLED', '1') == '1')
+    # Octets minimum, niveau gzip (1-9), qualité brotli (0-11 ; 4-5 pour du dynamique)
+    app.config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('COMPRESS_MIN_SIZE', 1024)))
+    app.config.setdefault('COMPRESS_LEVEL', int(os.environ.get('COMPRESS_LEVEL', 6)))
+    app.config.setdefault('COMPRESS_BR_QUALITY', int(os.environ.get('COMPRESS_BR_QUALITY', 4)))
+    if app.config['COMPRESS_ENABLED']:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=app.config['COMPRESS_MIN_SIZE'],
+            level=app.config['COMPRESS_LEVEL'],
+            br_quality=app.config['COMPRESS_BR_QUALITY'],
+        )
+
+
+def negotiate(accept_encoding):
+    accepted = parse_accept_header(accept_encoding)
+    if accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compressor(encoding, level, br_quality):
+    # Objet avec process(data) / finish() pour les deux encodages
+    if encoding == 'br':
+        return brotli.Compressor(quality=br_quality)
+    return _Gzip(level)
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data):
+        return self._obj.compress(data)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=1024, level=6, br_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.br_quality = br_quality
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            # Réponse retenue jusqu'à savoir si elle sera compressée
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return self._unsupported_write
+
+        app_iter = self.app(environ, capture)
+        status, headers = captured['status'], Headers(captured['headers'])
+        if not self._compressible(status, headers):
+            start_response(status, list(headers), captured['exc_info'])
+            return app_iter
+        vary = headers.get('Vary', '')
+        if 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            start_response(status, list(headers), captured['exc_info'])
+            return app_iter
+
+        length = headers.get('Content-Length', type=int)
+        if length is not None and length < self.min_size:
+            start_response(status, list(headers), captured['exc_info'])
+            return app_iter
+        # La représentation compressée n'est pas identique octet pour octet
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+        headers['Content-Encoding'] = encoding
+        stream = compressor(encoding, self.level, self.br_quality)
+
+        if length is not None:
+            # Corps déjà en mémoire (rendu de template, JSON) : un seul bloc
+            try:
+                body = b''.join(stream.process(chunk) for chunk in app_iter) + stream.finish()
+            finally:
+                _close(app_iter)
+            headers['Content-Length'] = str(len(body))
+            start_response(status, list(headers), captured['exc_info'])
+            return [body]
+
+        headers.remove('Content-Length')
+        start_response(status, list(headers), captured['exc_info'])
+        return self._stream(app_iter, stream)
+
+    def _compressible(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code >= 300 or code in (204, 206):
+            return False
+        if 'Content-Encoding' in headers or 'Content-Range' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        return headers.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _stream(app_iter, stream):
+        # Générateur (export CSV…) : compressé au fil de l'eau, sans tout garder en mémoire
+        try:
+            for chunk in app_iter:
+                data = stream.process(chunk)
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            _close(app_iter)
+
+    @staticmethod
+    def _unsupported_write(data):
+        raise RuntimeError('write() non pris en charge par CompressionMiddleware')
+
+
+def _close(app_iter):
+    close = getattr(app_iter, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,249 @@
+import re
+import html
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+import click
+from flask.cli import AppGroup
+from sqlalchemy import or_
+from . import db
+
+
+# ── RENDU DES ARTICLES ──
+# Le texte saisi dans l'admin (paragraphes séparés par une ligne vide,
+# **gras**, *italique*, ![alt](url), --- et « # titre », ou HTML en mode
+# HTML) est transformé une seule fois, à l'enregistrement : HTML assaini,
+# texte brut (recherche, flux), résumé automatique et temps de lecture sont
+# stockés avec l'article. Seules les balises de ALLOWED_TAGS (sans script,
+# style ni attributs on*) et celles produites ici arrivent dans content_html.
+RENDER_VERSION = 1
+WORDS_PER_MINUTE = 230
+SUMMARY_LENGTH = 220
+
+SIGNATURES = ('*Influençons', "À l'essentiel", 'Influençons autrement', '— Grace')
+IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)')
+BOLD = re.compile(r'\*\*(.+?)\*\*')
+ITALIC = re.compile(r'\*(.+?)\*')
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h2', 'h3', 'h4', 'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup',
+    'blockquote', 'ul', 'ol', 'li', 'a', 'img', 'figure', 'figcaption', 'span', 'code', 'pre',
+}
+ALLOWED_ATTRS = {'a': {'href', 'title'}, 'img': {'src', 'alt', 'title', 'width', 'height'}}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Texte brut : passage à la ligne autour des blocs
+BLOCK_TAGS = {'p', 'br', 'hr', 'h2', 'h3', 'h4', 'blockquote', 'ul', 'ol', 'li', 'figure', 'pre'}
+BLOCK_START = tuple(f'<{tag}' for tag in ('p', 'h2', 'h3', 'h4', 'blockquote', 'ul', 'ol', 'figure', 'pre', 'hr'))
+# Balises supprimées avec leur contenu
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'textarea'}
+
+
+def safe_url(url):
+    # Pas de javascript:, data:… : http(s), mailto ou chemins relatifs
+    return urlsplit(url.strip()).scheme.lower() in ('', 'http', 'https', 'mailto')
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self, text_only=False):
+        super().__init__(convert_charrefs=True)
+        self.text_only = text_only
+        self.out = []
+        self.open = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.skip += 1
+            return
+        if self.text_only and tag in BLOCK_TAGS:
+            self.out.append('\n')
+        if self.skip or self.text_only or tag not in ALLOWED_TAGS:
+            return
+        kept = ''.join(
+            f' {name}="{html.escape(value)}"' for name, value in attrs
+            if name in ALLOWED_ATTRS.get(tag, ()) and value is not None
+            and (name not in ('href', 'src') or safe_url(value))
+        )
+        if tag == 'a':
+            kept += ' rel="noopener nofollow"'
+        elif tag == 'img':
+            if ' src=' not in kept:
+                return
+            kept += ' loading="lazy"'
+        self.out.append(f'<{tag}{kept}>')
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif self.text_only:
+            if tag in BLOCK_TAGS:
+                self.out.append('\n')
+        elif not self.skip and tag in self.open:
+            # Referme aussi les balises laissées ouvertes à l'intérieur
+            while self.open:
+                last = self.open.pop()
+                self.out.append(f'</{last}>')
+                if last == tag:
+                    break
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.out.append(data if self.text_only else html.escape(data))
+
+    def result(self):
+        self.close()
+        return ''.join(self.out) + ''.join(f'</{tag}>' for tag in reversed(self.open))
+
+
+def sanitize(fragment):
+    parser = _Sanitizer()
+    parser.feed(fragment)
+    return parser.result()
+
+
+def strip_tags(fragment):
+    parser = _Sanitizer(text_only=True)
+    parser.feed(fragment)
+    return parser.result()
+
+
+def _image(match):
+    alt, src = match.group(1), match.group(2)
+    if not safe_url(html.unescape(src)):
+        return alt
+    return (f'<img src="{src}" alt="{alt}" loading="lazy" '
+            'style="width:100%;border-radius:12px;margin:1.2rem 0;display:block;">')
+
+
+def render_inline(text):
+    text = sanitize(text)
+    text = IMAGE.sub(_image, text)
+    text = BOLD.sub(r'<strong>\1</strong>', text)
+    return ITALIC.sub(r'<em>\1</em>', text)
+
+
+def _is_signature(line):
+    return line.startswith(SIGNATURES) or '— Grace' in line
+
+
+def render_html(raw):
+    lines = html.unescape(raw or '').splitlines()
+    parts, buffer = [], []
+
+    def flush():
+        joined = ' '.join(buffer).strip()
+        rendered = render_inline(joined).strip()
+        if rendered.startswith(BLOCK_START):
+            # Mode HTML : le bloc a déjà sa balise
+            parts.append(rendered)
+        elif rendered:
+            # Ligne courte isolée → citation mise en avant
+            if len(buffer) == 1 and len(joined) < 80 and not joined.endswith('.'):
+                parts.append(f'<p class="pull">{rendered}</p>')
+            else:
+                parts.append(f'<p>{rendered}</p>')
+        buffer.clear()
+
+    for line in lines:
+        line = line.strip()
+        if line in ('---', '***'):
+            flush()
+            parts.append('<hr>')
+        elif not line:
+            flush()
+        elif line.startswith('# '):
+            flush()
+            parts.append(
+                '<h3 style="font-family:\'Cormorant Garamond\',serif;font-size:1.5rem;'
+                f'color:var(--violet-deep);margin:1.8rem 0 .8rem;">{sanitize(line[2:])}</h3>'
+            )
+        elif _is_signature(line):
+            flush()
+            parts.append(f'<p class="signature">{render_inline(line)}</p>')
+        else:
+            buffer.append(line)
+    flush()
+    return '\n'.join(parts)
+
+
+def plain_text(raw):
+    # Paragraphes sans mise en forme (les images gardent leur texte alternatif)
+    paragraphs, buffer = [], []
+    for line in strip_tags(html.unescape(raw or '')).splitlines():
+        line = line.strip()
+        if line in ('---', '***') or not line:
+            if buffer:
+                paragraphs.append(' '.join(buffer))
+                buffer = []
+            continue
+        line = IMAGE.sub(r'\1', line.removeprefix('# '))
+        buffer.append(ITALIC.sub(r'\1', BOLD.sub(r'\1', line)).strip())
+    if buffer:
+        paragraphs.append(' '.join(buffer))
+    return '\n\n'.join(p for p in paragraphs if p)
+
+
+def summarize(text, length=SUMMARY_LENGTH):
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0].rstrip(',;:') + '…'
+
+
+def reading_stats(text):
+    # (nombre de mots, minutes de lecture)
+    words = len(re.findall(r'\w+', text))
+    return words, max(1, round(words / WORDS_PER_MINUTE))
+
+
+def prepare(article):
+    # À appeler avant le commit de chaque création / modification d'article
+    text = plain_text(article.content)
+    words, minutes = reading_stats(text)
+    article.content_html = render_html(article.content)
+    article.content_text = text
+    article.summary = (article.excerpt or '').strip() or summarize(text)
+    article.word_count = words
+    article.reading_time = minutes
+    article.render_version = RENDER_VERSION
+
+
+def stale_articles():
+    # Articles jamais rendus ou rendus par une version précédente de ce module
+    from .models import Article
+    return Article.query.filter(or_(Article.render_version.is_(None), Article.render_version < RENDER_VERSION))
+
+
+def render_articles(everything=False):
+    # Rendu des articles périmés (ou de tous) puis index de recherche ; lancé par `flask release`
+    from .models import Article
+    from . import search, page_cache, counters
+    query = Article.query if everything else stale_articles()
+    count = 0
+    for article in query.order_by(Article.id).all():
+        prepare(article)
+        count += 1
+    if count:
+        db.session.flush()
+        search.reindex()
+    db.session.commit()
+    if count:
+        counters.bump_version()
+        page_cache.clear()
+    return count
+
+
+# ── CLI ──
+articles_cli = AppGroup('articles', help='Rendu des articles.')
+
+
+@articles_cli.command('render')
+@click.option('--all', 'everything', is_flag=True, help='Tout recalculer, pas seulement les articles périmés.')
+def render_command(everything):
+    """Recalcule HTML, texte brut, résumé et temps de lecture des articles."""
+    click.echo(f'{render_articles(everything)} article(s) rendu(s).')
@@ -0,0 +1,102 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, update, case
+from . import db
+from .models import Counter, Article, Defi, SolidariteAction, ForumTopic, Newsletter
+
+
+# ── COMPTEURS ──
+# Les statistiques du tableau de bord sont lues dans la table counters (une
+# seule requête) au lieu de COUNT(*) sur chaque table. Les handlers appellent
+# bump() avant leur commit : le compteur change dans la même transaction.
+COUNTED = {
+    'articles':    lambda: db.session.query(func.count(Article.id)),
+    'defis':       lambda: db.session.query(func.count(Defi.id)),
+    'solidarite':  lambda: db.session.query(func.count(SolidariteAction.id)),
+    'topics':      lambda: db.session.query(func.count(ForumTopic.id)),
+    'subscribers': lambda: db.session.query(func.count(Newsletter.id)).filter(Newsletter.is_active.is_(True)),
+}
+
+
+def bump(name, delta=1):
+    if delta:
+        db.session.execute(
+            update(Counter).where(Counter.name == name).values(value=Counter.value + delta)
+        )
+
+
+def snapshot():
+    values = dict(db.session.query(Counter.name, Counter.value).all())
+    if not set(COUNTED) <= set(values):
+        # Première utilisation : compteurs initialisés par un comptage complet
+        reconcile()
+        db.session.commit()
+        values = dict(db.session.query(Counter.name, Counter.value).all())
+    return values
+
+
+def reconcile():
+    # Recalcule chaque compteur ; renvoie les écarts corrigés {nom: (avant, après)}
+    drift = {}
+    for name, count in COUNTED.items():
+        # Verrou sur le compteur d'abord : les bump() concurrents attendent le commit
+        counter = db.session.get(Counter, name, with_for_update=True)
+        actual = count().scalar()
+        if counter is None:
+            db.session.add(Counter(name=name, value=actual))
+            drift[name] = (None, actual)
+        elif counter.value != actual:
+            drift[name] = (counter.value, actual)
+            counter.value = actual
+    return drift
+
+
+# ── VERSION DU CONTENU PUBLIC ──
+# ETag / Last-Modified de l'accueil et de la recherche. Tenue en base (ligne
+# content_version), donc commune à tous les workers et à tous les hôtes :
+# horodatage en secondes, strictement croissant. Chaque process la garde
+# CONTENT_VERSION_TTL secondes : un 304 coûte au plus une lecture de counters
+# par worker et par intervalle, et un changement fait ailleurs est vu dans ce délai.
+VERSION = 'content_version'
+_version = None
+
+
+def version():
+    global _version
+    now = time.monotonic()
+    cached = _version
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    value = db.session.query(Counter.value).filter(Counter.name == VERSION).scalar() or 0
+    _version = (value, now + current_app.config['CONTENT_VERSION_TTL'])
+    return value
+
+
+def bump_version():
+    # Après le commit du contenu : transaction à part, +1 si plusieurs changements dans la même seconde
+    global _version
+    now = int(time.time())
+    result = db.session.execute(
+        update(Counter).where(Counter.name == VERSION)
+        .values(value=case((Counter.value >= now, Counter.value + 1), else_=now))
+    )
+    if not result.rowcount:
+        db.session.add(Counter(name=VERSION, value=now))
+    db.session.commit()
+    _version = None
+
+
+# ── CLI ──
+counters_cli = AppGroup('counters', help='Compteurs du tableau de bord.')
+
+
+@counters_cli.command('reconcile')
+def reconcile_command():
+    """Recalcule les compteurs (à lancer périodiquement, ex. cron horaire)."""
+    drift = reconcile()
+    db.session.commit()
+    for name, (before, after) in drift.items():
+        click.echo(f'{name} : {before} → {after}')
+    click.echo(f'{len(drift)} compteur(s) corrigé(s).')
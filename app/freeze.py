@@ -0,0 +1,196 @@
+import os
+import gzip
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import brotli
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.orm import load_only
+from werkzeug.utils import send_file
+from . import db
+from .compress import negotiate
+
+log = logging.getLogger(__name__)
+
+# ── PAGES FIGÉES ──
+# FREEZE_ENABLED=1 : l'accueil et le contenu JSON de chaque article publié
+# (chargé par la modale de l'accueil) sont rendus dans FREEZE_PATH, avec
+# leurs versions .br / .gz, à chaque changement de contenu (thread en
+# arrière-plan) et par `flask freeze`. FrozenMiddleware les sert sans Flask
+# ni base de données ; un fichier absent retombe sur la vue dynamique.
+#   /                     → index.html
+#   /api/articles/<slug>  → api/articles/<slug>.json
+# Un serveur statique peut servir ce dossier directement (try_files).
+# Les visiteurs avec un cookie de session (messages flash, admin) passent
+# toujours par Flask.
+INDEX_FILE = 'index.html'
+ARTICLES_DIR = os.path.join('api', 'articles')
+ARTICLES_PREFIX = '/api/articles/'
+MANIFEST = 'manifest.json'
+BATCH_SIZE = 500
+
+_executor = None
+_pending = threading.Event()
+_running = threading.Lock()
+
+
+def init_app(app):
+    app.config.setdefault('FREEZE_ENABLED', os.environ.get('FREEZE_ENABLED', '0') == '1')
+    app.config.setdefault('FREEZE_PATH', os.environ.get('FREEZE_PATH', os.path.join(app.instance_path, 'frozen')))
+    # 0 : un serveur statique devant l'application sert déjà FREEZE_PATH
+    app.config.setdefault('FREEZE_SERVE', os.environ.get('FREEZE_SERVE', '1') == '1')
+    app.cli.add_command(freeze_command)
+    if app.config['FREEZE_ENABLED'] and app.config['FREEZE_SERVE']:
+        app.wsgi_app = FrozenMiddleware(app.wsgi_app, app.config['FREEZE_PATH'], app.config['SESSION_COOKIE_NAME'])
+
+
+def enabled():
+    return current_app.config['FREEZE_ENABLED']
+
+
+# ── ÉCRITURE ──
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _emit(path, data):
+    # Versions compressées d'abord : le fichier principal publié en dernier
+    _write(path + '.br', brotli.compress(data, quality=11))
+    _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    _write(path, data)
+
+
+def _remove(path):
+    for name in (path, path + '.br', path + '.gz'):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+def _article_stamp(art):
+    stamp = art.updated_at or art.created_at
+    return hashlib.md5(f'{art.id}:{stamp.isoformat()}:{art.render_version}'.encode()).hexdigest()[:20]
+
+
+def freeze(force=False):
+    # Accueil toujours re-rendu ; articles réécrits seulement s'ils ont changé
+    from .models import Article
+    from .queries import published_articles
+    from .routes.main import _render_index, article_payload, payload_rows
+    root = current_app.config['FREEZE_PATH']
+    manifest_path = os.path.join(root, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    with current_app.test_request_context('/'):
+        _emit(os.path.join(root, INDEX_FILE), _render_index().encode())
+
+    stamps, changed = {}, []
+    rows = published_articles().options(
+        load_only(Article.id, Article.slug, Article.updated_at, Article.created_at, Article.render_version)
+    ).all()
+    for art in rows:
+        stamps[art.slug] = _article_stamp(art)
+        path = os.path.join(root, ARTICLES_DIR, f'{art.slug}.json')
+        if force or previous.get(art.slug) != stamps[art.slug] or not os.path.exists(path):
+            changed.append(art.id)
+    # Colonnes de la réponse (HTML rendu compris) relues par lots, pour les seuls articles modifiés
+    for start in range(0, len(changed), BATCH_SIZE):
+        for row in payload_rows(changed[start:start + BATCH_SIZE]):
+            path = os.path.join(root, ARTICLES_DIR, f'{row.slug}.json')
+            _emit(path, current_app.json.dumps(article_payload(row)).encode())
+    # Dépubliés, supprimés ou renommés
+    removed = [slug for slug in previous if slug not in stamps]
+    for slug in removed:
+        _remove(os.path.join(root, ARTICLES_DIR, f'{slug}.json'))
+    _write(manifest_path, json.dumps(stamps).encode())
+    return {'articles': len(stamps), 'written': len(changed), 'removed': len(removed)}
+
+
+# ── ARRIÈRE-PLAN ──
+def schedule(app=None):
+    # Appelé après chaque commit de contenu (app à passer hors contexte Flask).
+    # Les demandes arrivées pendant un rendu sont regroupées en un seul rendu suivant.
+    app = app or current_app._get_current_object()
+    if not app.config['FREEZE_ENABLED'] or _pending.is_set():
+        return
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='freeze')
+    _pending.set()
+    _executor.submit(_run, app)
+
+
+def _run(app):
+    with _running:
+        _pending.clear()
+        with app.app_context():
+            try:
+                freeze()
+            except Exception:
+                log.exception('Rendu des pages figées impossible')
+            finally:
+                db.session.remove()
+
+
+# ── SERVICE ──
+class FrozenMiddleware:
+    def __init__(self, app, root, session_cookie):
+        self.app = app
+        self.root = root
+        self.session_cookie = f'{session_cookie}='
+
+    def __call__(self, environ, start_response):
+        path = self._lookup(environ)
+        if path is None:
+            return self.app(environ, start_response)
+        mimetype = 'text/html' if path.endswith('.html') else 'application/json'
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding)
+        served = path + suffix if suffix and os.path.isfile(path + suffix) else path
+        response = send_file(served, environ, mimetype=mimetype, conditional=True, etag=True)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        response.headers['Vary'] = 'Accept-Encoding'
+        if served != path:
+            response.headers['Content-Encoding'] = encoding
+        return response(environ, start_response)
+
+    def _lookup(self, environ):
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return None
+        if self.session_cookie in environ.get('HTTP_COOKIE', ''):
+            return None
+        url = environ.get('PATH_INFO', '')
+        if url == '/':
+            path = os.path.join(self.root, INDEX_FILE)
+        elif url.startswith(ARTICLES_PREFIX):
+            slug = url[len(ARTICLES_PREFIX):]
+            if not slug or '/' in slug or slug.startswith('.'):
+                return None
+            path = os.path.join(self.root, ARTICLES_DIR, f'{slug}.json')
+        else:
+            return None
+        return path if os.path.isfile(path) else None
+
+
+@click.command('freeze')
+@click.option('--force', is_flag=True, help='Réécrire tous les articles, pas seulement ceux modifiés.')
+@with_appcontext
+def freeze_command(force):
+    """Rend l'accueil et les articles publiés en fichiers statiques (FREEZE_PATH)."""
+    report = freeze(force)
+    click.echo(f"Accueil et {report['articles']} article(s) figés : "
+               f"{report['written']} écrit(s), {report['removed']} supprimé(s).")
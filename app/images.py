@@ -0,0 +1,281 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app, request
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+from PIL import Image, ImageOps
+
+log = logging.getLogger(__name__)
+
+UPLOAD_URL = '/static/uploads/'
+# Largeurs générées pour les srcset (jamais plus grandes que l'original)
+VARIANT_WIDTHS = (480, 960, 1600)
+# L'original servi tel quel est réduit à cette largeur maximale
+MAX_WIDTH = 2400
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+CHUNK_SIZE = 64 * 1024
+# Les URL d'upload ne changent jamais de contenu : cache navigateur/CDN d'un an
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+_executor = None
+_manifests = {}
+
+
+def init_app(app):
+    app.config.setdefault('IMAGE_WORKERS', int(os.environ.get('IMAGE_WORKERS', 2)))
+    app.jinja_env.globals['responsive_img'] = responsive_img
+    app.after_request(_upload_cache_headers)
+    app.cli.add_command(images_cli)
+
+
+def upload_folder():
+    return os.path.join(current_app.static_folder, 'uploads')
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config['IMAGE_WORKERS'], thread_name_prefix='images'
+        )
+    return _executor
+
+
+# ── STOCKAGE (adressé par contenu) ──
+def store_upload(file, ext):
+    # Nom = empreinte SHA-256 du contenu : un même fichier n'est stocké qu'une fois.
+    # Écriture par blocs pendant le hachage, puis renommage atomique.
+    ext = 'jpg' if ext == 'jpeg' else ext
+    folder = upload_folder()
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix='.part')
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        name = f'{digest.hexdigest()[:32]}.{ext}'
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            os.replace(tmp, path)
+            schedule(path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return f'{UPLOAD_URL}{name}'
+
+
+def _upload_cache_headers(response):
+    if request.endpoint != 'static' or response.status_code != 200:
+        return response
+    filename = (request.view_args or {}).get('filename', '')
+    if not filename.startswith('uploads/') or filename.endswith('.json'):
+        return response
+    stem = os.path.splitext(filename[len('uploads/'):])[0]
+    # Un original n'est figé qu'une fois ré-encodé (manifeste présent)
+    if '-' in stem or os.path.exists(os.path.join(upload_folder(), f'{stem}.variants.json')):
+        response.headers['Cache-Control'] = IMMUTABLE
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+# ── TRAITEMENT ──
+def schedule(path):
+    # Traitement en arrière-plan : la requête admin n'attend pas Pillow
+    _pool().submit(_process_safely, path, current_app._get_current_object())
+
+
+def _process_safely(path, app):
+    try:
+        process(path)
+    except Exception:
+        log.exception("Traitement de l'image %s impossible", path)
+        return
+    # Les pages en cache ne connaissent pas encore les variantes
+    from . import page_cache, counters, freeze
+    with app.app_context():
+        counters.bump_version()
+    page_cache.clear()
+    freeze.schedule(app)
+
+
+def _save_atomic(img, path, **params):
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    img.save(tmp, **params)
+    os.replace(tmp, path)
+
+
+def process(path):
+    # Décodage unique, rotation EXIF appliquée puis métadonnées supprimées
+    folder, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    manifest_path = os.path.join(folder, f'{stem}.variants.json')
+    # Déjà traité : l'original (URL immuable) n'est pas ré-encodé une seconde fois
+    reencode = not os.path.exists(manifest_path)
+    with Image.open(path) as src:
+        if getattr(src, 'is_animated', False):
+            return None
+        fmt = src.format
+        img = ImageOps.exif_transpose(src)
+        img.load()
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    img = img.convert('RGBA' if has_alpha else 'RGB')
+    if img.width > MAX_WIDTH:
+        img = img.resize((MAX_WIDTH, round(img.height * MAX_WIDTH / img.width)), Image.LANCZOS)
+
+    # Original ré-encodé sans EXIF (même URL, même format)
+    if reencode and fmt == 'JPEG':
+        _save_atomic(img.convert('RGB'), path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif reencode and fmt == 'PNG':
+        _save_atomic(img, path, format='PNG', optimize=True)
+    elif reencode and fmt == 'WEBP':
+        _save_atomic(img, path, format='WEBP', quality=WEBP_QUALITY)
+
+    manifest = {'webp': [], 'jpeg': []}
+    widths = sorted({min(w, img.width) for w in VARIANT_WIDTHS})
+    for width in widths:
+        variant = img if width == img.width else \
+            img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        name = f'{stem}-{width}'
+        _save_atomic(variant, os.path.join(folder, f'{name}.webp'), format='WEBP', quality=WEBP_QUALITY, method=4)
+        manifest['webp'].append([width, f'{name}.webp'])
+        if not has_alpha:
+            _save_atomic(variant, os.path.join(folder, f'{name}.jpg'),
+                         format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            manifest['jpeg'].append([width, f'{name}.jpg'])
+
+    tmp = f'{manifest_path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+# ── RENDU ──
+def variants(url):
+    # Variantes connues d'une image uploadée (None tant que le traitement n'est pas fini)
+    if not url or not url.startswith(UPLOAD_URL):
+        return None
+    stem = os.path.splitext(url[len(UPLOAD_URL):])[0]
+    if stem in _manifests:
+        return _manifests[stem]
+    try:
+        with open(os.path.join(upload_folder(), f'{stem}.variants.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _manifests[stem] = manifest
+    return manifest
+
+
+def _srcset(entries):
+    return ', '.join(f'{UPLOAD_URL}{name} {width}w' for width, name in entries)
+
+
+def responsive_img(url, alt='', sizes='100vw', loading='lazy'):
+    # <picture> WebP + JPEG avec srcset/sizes ; simple <img> sinon
+    manifest = variants(url)
+    img_attrs = f'alt="{escape(alt)}" loading="{loading}"'
+    if not manifest:
+        return Markup(f'<img src="{escape(url)}" {img_attrs}>')
+    html = '<picture style="display:contents">'
+    if manifest['webp']:
+        html += f'<source type="image/webp" srcset="{_srcset(manifest["webp"])}" sizes="{escape(sizes)}">'
+    if manifest['jpeg']:
+        html += f'<img src="{escape(url)}" srcset="{_srcset(manifest["jpeg"])}" sizes="{escape(sizes)}" {img_attrs}>'
+    else:
+        html += f'<img src="{escape(url)}" {img_attrs}>'
+    return Markup(html + '</picture>')
+
+
+# ── CLI ──
+images_cli = AppGroup('images', help='Images uploadées : variantes et nettoyage.')
+
+
+@images_cli.command('process')
+@click.option('--force', is_flag=True, help='Retraiter aussi les images ayant déjà des variantes.')
+def process_command(force):
+    """(Re)génère les variantes des images uploadées."""
+    folder = upload_folder()
+    if not os.path.isdir(folder):
+        return
+    done = 0
+    for filename in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in ('.png', '.jpg', '.jpeg', '.webp', '.gif') or '-' in stem:
+            continue
+        if not force and os.path.exists(os.path.join(folder, f'{stem}.variants.json')):
+            continue
+        try:
+            process(os.path.join(folder, filename))
+            done += 1
+        except Exception as e:
+            click.echo(f'{filename} : {e}', err=True)
+    click.echo(f'{done} image(s) traitée(s).')
+
+
+UPLOAD_REF = re.compile(re.escape(UPLOAD_URL) + r'([0-9A-Za-z_]+)')
+
+
+def references():
+    # Nombre de références en base de chaque upload (colonnes image_url et images du contenu,
+    # y compris le corps des campagnes déjà envoyées : les e-mails reçus pointent encore dessus)
+    from . import db
+    from .models import Article, Defi, SolidariteAction, Campaign
+    counts = {}
+    queries = (
+        db.session.query(Article.image_url, Article.content),
+        db.session.query(Defi.image_url, Defi.description),
+        db.session.query(SolidariteAction.image_url, SolidariteAction.description),
+        db.session.query(Campaign.body),
+    )
+    for query in queries:
+        for row in query.yield_per(500):
+            for text in row:
+                for stem in UPLOAD_REF.findall(text or ''):
+                    counts[stem] = counts.get(stem, 0) + 1
+    return counts
+
+
+@images_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='Lister sans supprimer.')
+@click.option('--min-age', default=3600, show_default=True,
+              help="Âge minimal (s) d'un fichier orphelin avant suppression (upload en cours).")
+def gc_command(dry_run, min_age):
+    """Supprime les uploads (et leurs variantes) qui ne sont plus référencés."""
+    folder = upload_folder()
+    if not os.path.isdir(folder):
+        return
+    refs = references()
+    now = time.time()
+    removed, freed = 0, 0
+    for filename in sorted(os.listdir(folder)):
+        path = os.path.join(folder, filename)
+        stem = filename.split('.', 1)[0].split('-', 1)[0]
+        if refs.get(stem) or now - os.path.getmtime(path) < min_age:
+            continue
+        size = os.path.getsize(path)
+        if dry_run:
+            click.echo(f'orphelin : {filename} ({size} o)')
+        else:
+            os.remove(path)
+            _manifests.pop(stem, None)
+        removed += 1
+        freed += size
+    action = 'à supprimer' if dry_run else 'supprimé(s)'
+    click.echo(f'{len(refs)} upload(s) référencé(s), {removed} fichier(s) {action} ({freed // 1024} Ko).')
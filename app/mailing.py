@@ -0,0 +1,376 @@
+import os
+import time
+import queue
+import random
+import smtplib
+import logging
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+from email.headerregistry import Address
+from email.policy import SMTP
+from email.utils import formatdate, make_msgid, parseaddr
+import click
+from flask import current_app, render_template, url_for
+from flask.cli import AppGroup
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import select, update
+from . import db, content
+from .models import Campaign, CampaignFailure, Newsletter
+
+log = logging.getLogger(__name__)
+
+# ── ENVOI DE LA NEWSLETTER ──
+# Une campagne est rendue une seule fois (HTML + texte) ; seuls l'adresse et
+# le lien de désinscription changent d'un destinataire à l'autre. Les abonnés
+# actifs sont lus par lots (pagination par id) ; chaque lot est distribué à
+# MAIL_CONNECTIONS threads qui gardent chacun une connexion SMTP ouverte,
+# sous un débit global MAIL_RATE (messages/seconde). Erreurs temporaires
+# (4xx, coupure) : reconnexion et nouvel essai avec attente croissante.
+# Seuls les refus propres à un destinataire (RCPT, ou message refusé après
+# DATA) le font noter dans campaign_failures. Serveur injoignable, identifiants
+# ou expéditeur refusés : le lot est abandonné et la campagne mise en pause.
+# Le curseur de la campagne avance à la fin de chaque lot (commit) : après
+# une interruption, `flask campaigns send` reprend au lot suivant, seul le
+# lot en cours peut être renvoyé.
+UNSUBSCRIBE_SALT = 'newsletter-unsubscribe'
+PLACEHOLDER = '__UNSUBSCRIBE_TOKEN__'
+# Lignes jusqu'à 998 caractères (RFC 5322) : l'URL de List-Unsubscribe n'est pas encodée ;
+# corps en quoted-printable (aucun relais ne dépend de 8BITMIME)
+POLICY = SMTP.clone(max_line_length=998, cte_type='7bit')
+
+
+def init_app(app):
+    app.config.setdefault('MAIL_SERVER', os.environ.get('MAIL_SERVER', 'localhost'))
+    app.config.setdefault('MAIL_PORT', int(os.environ.get('MAIL_PORT', 25)))
+    app.config.setdefault('MAIL_USERNAME', os.environ.get('MAIL_USERNAME', ''))
+    app.config.setdefault('MAIL_PASSWORD', os.environ.get('MAIL_PASSWORD', ''))
+    # starttls (port 587) ou ssl (port 465)
+    app.config.setdefault('MAIL_SECURITY', os.environ.get('MAIL_SECURITY', ''))
+    app.config.setdefault('MAIL_FROM', os.environ.get('MAIL_FROM', 'Influençons.com <newsletter@influencons.com>'))
+    app.config.setdefault('MAIL_CONNECTIONS', int(os.environ.get('MAIL_CONNECTIONS', 4)))
+    app.config.setdefault('MAIL_RATE', float(os.environ.get('MAIL_RATE', 50)))
+    app.config.setdefault('MAIL_BATCH_SIZE', int(os.environ.get('MAIL_BATCH_SIZE', 200)))
+    app.config.setdefault('MAIL_MAX_RETRIES', int(os.environ.get('MAIL_MAX_RETRIES', 3)))
+    # Beaucoup de serveurs limitent le nombre de messages par connexion
+    app.config.setdefault('MAIL_MESSAGES_PER_CONNECTION', int(os.environ.get('MAIL_MESSAGES_PER_CONNECTION', 100)))
+    # Adresse publique du site, pour les liens des e-mails
+    app.config.setdefault('SITE_URL', os.environ.get('SITE_URL', 'http://localhost:5000'))
+    app.cli.add_command(campaigns_cli)
+
+
+# ── DÉSINSCRIPTION ──
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=UNSUBSCRIBE_SALT)
+
+
+def email_from_token(token):
+    try:
+        return _serializer().loads(token)
+    except BadSignature:
+        return None
+
+
+# ── RENDU ──
+class CampaignMessage:
+    # Rendu unique par campagne ; build() ne fait que des remplacements de chaînes
+    def __init__(self, campaign):
+        config = current_app.config
+        with current_app.test_request_context(base_url=config['SITE_URL']):
+            unsubscribe_url = url_for('main.newsletter_unsubscribe', token=PLACEHOLDER, _external=True)
+            html = render_template('email/campaign.html', campaign=campaign,
+                                   body=content.render_html(campaign.body), unsubscribe_url=unsubscribe_url)
+        self.text = f'{content.plain_text(campaign.body)}\n\n--\nSe désinscrire : {unsubscribe_url}\n'
+        self.html = html
+        self.unsubscribe_url = unsubscribe_url
+        self.subject = campaign.subject
+        # Créé ici : build() tourne dans les threads d'envoi, hors contexte Flask
+        self.serializer = _serializer()
+        name, self.sender = parseaddr(config['MAIL_FROM'])
+        self.from_header = Address(name, addr_spec=self.sender)
+        self.domain = self.sender.rsplit('@', 1)[-1]
+
+    def build(self, email):
+        token = self.serializer.dumps(email)
+        msg = EmailMessage(policy=POLICY)
+        msg['Subject'] = self.subject
+        msg['From'] = self.from_header
+        msg['To'] = email
+        msg['Date'] = formatdate(localtime=False)
+        msg['Message-ID'] = make_msgid(domain=self.domain)
+        # Désinscription en un clic (RFC 8058), exigée par les grandes messageries
+        msg['List-Unsubscribe'] = f'<{self.unsubscribe_url.replace(PLACEHOLDER, token)}>'
+        msg['List-Unsubscribe-Post'] = 'List-Unsubscribe=One-Click'
+        msg.set_content(self.text.replace(PLACEHOLDER, token))
+        msg.add_alternative(self.html.replace(PLACEHOLDER, token), subtype='html')
+        return msg.as_bytes()
+
+
+# ── CONNEXIONS / DÉBIT ──
+class Throttle:
+    # Créneaux espacés de 1/rate secondes, partagés par tous les threads d'envoi
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def connect(config):
+    if config['MAIL_SECURITY'] == 'ssl':
+        conn = smtplib.SMTP_SSL(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=30)
+    else:
+        conn = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=30)
+        if config['MAIL_SECURITY'] == 'starttls':
+            conn.starttls()
+    if config['MAIL_USERNAME']:
+        conn.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+    return conn
+
+
+def _quit(conn):
+    try:
+        conn.quit()
+    except (smtplib.SMTPException, OSError):
+        conn.close()
+
+
+def _permanent(exc):
+    # 5xx : l'adresse ou le message est refusé, inutile de réessayer
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def _recipient_error(exc):
+    # Refus qui ne concerne que ce destinataire ; le reste (connexion, login,
+    # MAIL FROM, HELO) vaudrait pour tous les suivants
+    return isinstance(exc, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError))
+
+
+def _still_open(exc):
+    # Le serveur a répondu (refus 4xx, transaction annulée par sendmail) : la
+    # connexion sert encore, sauf 421 (fermeture annoncée)
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code != 421 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code != 421
+
+
+class DeliveryStopped(Exception):
+    # Panne de connexion ou compte d'envoi refusé : rien ne partira, lot abandonné
+    pass
+
+
+class Sender:
+    # Threads d'envoi à connexion persistante, vivants pendant toute la campagne
+    def __init__(self, config, message):
+        self.config = config
+        self.message = message
+        self.throttle = Throttle(config['MAIL_RATE'])
+        self.jobs = queue.Queue(maxsize=config['MAIL_BATCH_SIZE'] * 2)
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._failures = []
+        self._stopped = None
+        self._threads = [
+            threading.Thread(target=self._work, name=f'mailing-{n}', daemon=True)
+            for n in range(config['MAIL_CONNECTIONS'])
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def send_batch(self, emails):
+        # Bloque jusqu'à l'envoi (ou l'échec définitif) de tout le lot
+        for email in emails:
+            self.jobs.put(email)
+        self.jobs.join()
+        with self._lock:
+            sent, failures = self._sent, self._failures
+            self._sent, self._failures = 0, []
+        if self._stopped is not None:
+            raise DeliveryStopped(self._stopped)
+        return sent, failures
+
+    def close(self, drain=False):
+        # drain : envoi interrompu, les messages encore en file ne partent pas
+        while drain:
+            try:
+                self.jobs.get_nowait()
+                self.jobs.task_done()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self.jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        conn, used = None, 0
+        while True:
+            email = self.jobs.get()
+            if email is None:
+                self.jobs.task_done()
+                break
+            try:
+                if self._stopped is not None:
+                    # Envoi arrêté : le reste du lot est seulement vidé de la file
+                    continue
+                if conn is not None and used >= self.config['MAIL_MESSAGES_PER_CONNECTION']:
+                    _quit(conn)
+                    conn, used = None, 0
+                conn, used = self._deliver(conn, used, email)
+            finally:
+                self.jobs.task_done()
+        if conn is not None:
+            _quit(conn)
+
+    def _deliver(self, conn, used, email):
+        try:
+            message = self.message.build(email)
+        except Exception as exc:
+            self._fail(email, exc)
+            return conn, used
+        retries = self.config['MAIL_MAX_RETRIES']
+        for attempt in range(retries + 1):
+            if self._stopped is not None:
+                return conn, used
+            self.throttle.wait()
+            try:
+                if conn is None:
+                    conn, used = connect(self.config), 0
+                conn.sendmail(self.message.sender, [email], message)
+                with self._lock:
+                    self._sent += 1
+                return conn, used + 1
+            except (smtplib.SMTPException, OSError) as exc:
+                if conn is not None and not _still_open(exc):
+                    conn.close()
+                    conn = None
+                if _permanent(exc) or attempt == retries:
+                    if _recipient_error(exc):
+                        self._fail(email, exc)
+                    else:
+                        self._stop(exc)
+                    return conn, used
+                # 1 s, 2 s, 4 s… avec gigue, pour ne pas revenir tous en même temps
+                time.sleep(2 ** attempt * (1 + random.random()))
+
+    def _stop(self, exc):
+        with self._lock:
+            if self._stopped is None:
+                log.error('Envoi arrêté : %s', exc)
+                self._stopped = f'{type(exc).__name__}: {exc}'[:300]
+
+    def _fail(self, email, exc):
+        log.warning('Envoi à %s impossible : %s', email, exc)
+        with self._lock:
+            self._failures.append((email, f'{type(exc).__name__}: {exc}'[:300]))
+
+
+# ── CAMPAGNE ──
+def claim(campaign_id, force=False):
+    # Une seule exécution à la fois : passage atomique à « sending »
+    allowed = ('draft', 'paused', 'sending') if force else ('draft', 'paused')
+    result = db.session.execute(
+        update(Campaign).where(Campaign.id == campaign_id, Campaign.status.in_(allowed))
+        .values(status='sending', started_at=db.func.coalesce(Campaign.started_at, datetime.utcnow()))
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def send_campaign(campaign, progress=None):
+    config = current_app.config
+    sender = Sender(config, CampaignMessage(campaign))
+    status = 'paused'
+    try:
+        while True:
+            rows = db.session.execute(
+                select(Newsletter.id, Newsletter.email)
+                .where(Newsletter.is_active.is_(True), Newsletter.id > campaign.cursor)
+                .order_by(Newsletter.id).limit(config['MAIL_BATCH_SIZE'])
+            ).all()
+            if not rows:
+                status = 'done'
+                break
+            sent, failures = sender.send_batch([email for _, email in rows])
+            campaign.cursor = rows[-1].id
+            campaign.sent_count += sent
+            campaign.failed_count += len(failures)
+            db.session.add_all(CampaignFailure(campaign_id=campaign.id, email=email, error=error)
+                               for email, error in failures)
+            db.session.commit()
+            if progress:
+                progress(campaign)
+    finally:
+        sender.close(drain=status != 'done')
+        campaign.status = status
+        if status == 'done':
+            campaign.finished_at = datetime.utcnow()
+        db.session.commit()
+    return campaign
+
+
+# ── CLI ──
+campaigns_cli = AppGroup('campaigns', help='Envoi de la newsletter aux abonnés actifs.')
+
+
+@campaigns_cli.command('create')
+@click.option('--subject', required=True)
+@click.option('--body-file', type=click.File(encoding='utf-8'), required=True,
+              help='Texte de la campagne (même syntaxe que les articles).')
+def create_command(subject, body_file):
+    """Crée une campagne (brouillon)."""
+    campaign = Campaign(subject=subject, body=body_file.read())
+    db.session.add(campaign)
+    db.session.commit()
+    click.echo(f'Campagne {campaign.id} créée.')
+
+
+@campaigns_cli.command('list')
+def list_command():
+    """Liste les campagnes et leur progression."""
+    for c in Campaign.query.order_by(Campaign.id.desc()).limit(20):
+        click.echo(f'{c.id:>4}  {c.status:<8} envoyés {c.sent_count:>7}  échecs {c.failed_count:>5}  {c.subject}')
+
+
+@campaigns_cli.command('send')
+@click.argument('campaign_id', type=int)
+@click.option('--force', is_flag=True, help='Reprendre une campagne restée « sending » (envoi interrompu brutalement).')
+def send_command(campaign_id, force):
+    """Envoie (ou reprend) une campagne."""
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        raise click.ClickException(f'Campagne {campaign_id} introuvable.')
+    if campaign.status == 'done':
+        raise click.ClickException('Campagne déjà envoyée.')
+    if not claim(campaign_id, force):
+        raise click.ClickException('Campagne déjà en cours d\'envoi (--force si le précédent envoi a été tué).')
+    db.session.refresh(campaign)
+    started = time.perf_counter()
+
+    def progress(c):
+        elapsed = time.perf_counter() - started
+        click.echo(f'{c.sent_count} envoyé(s), {c.failed_count} échec(s) — {c.sent_count / elapsed * 60:.0f}/min')
+
+    try:
+        send_campaign(campaign, progress)
+    except KeyboardInterrupt:
+        click.echo(f'Interrompue : reprise avec `flask campaigns send {campaign_id}`.', err=True)
+        raise SystemExit(1)
+    except DeliveryStopped as exc:
+        raise click.ClickException(f'Envoi arrêté ({exc}) : campagne en pause après {campaign.sent_count} '
+                                   f'envoi(s), reprise avec `flask campaigns send {campaign_id}`.')
+    click.echo(f'Campagne {campaign_id} : {campaign.status}, {campaign.sent_count} envoyé(s), '
+               f'{campaign.failed_count} échec(s).')
@@ -0,0 +1,180 @@
+import os
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# ── INSTRUMENTATION ──
+# Activée par METRICS_ENABLED=1. Pour chaque requête : nombre et durée des
+# requêtes SQL (événements du moteur), durée de rendu des templates (signaux
+# Flask), durée totale et taille de la réponse (avant compression). Le
+# résultat part dans l'en-tête Server-Timing et dans des histogrammes par
+# endpoint, lisibles au format Prometheus sur /admin/metrics.
+# Les agrégats sont propres à chaque worker gunicorn (en mémoire, remis à
+# zéro au redémarrage) : le label `worker` les distingue.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ('Durée de traitement de la requête', DURATION_BUCKETS),
+    'sql_queries': ('Requêtes SQL exécutées par requête HTTP', QUERY_BUCKETS),
+    'sql_duration_seconds': ('Temps SQL cumulé par requête HTTP', DURATION_BUCKETS),
+    'template_duration_seconds': ('Temps de rendu des templates par requête HTTP', DURATION_BUCKETS),
+    'response_bytes': ('Taille du corps de réponse, avant compression', SIZE_BUCKETS),
+}
+PREFIX = 'influencons_'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.n_plus_one = Counter()
+
+    def observe(self, name, endpoint, value):
+        with self._lock:
+            key = (name, endpoint)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+            self.histograms[key].observe(value)
+
+    def flag_n_plus_one(self, endpoint):
+        with self._lock:
+            self.n_plus_one[endpoint] += 1
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+            self.n_plus_one.clear()
+
+    def render(self):
+        # Format texte d'exposition Prometheus (version 0.0.4)
+        worker = os.getpid()
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines += [f'# HELP {PREFIX}{name} {help_text}', f'# TYPE {PREFIX}{name} histogram']
+                for (metric, endpoint), hist in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'endpoint="{endpoint}",worker="{worker}"'
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), hist.counts):
+                        cumulative += count
+                        lines.append(f'{PREFIX}{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{PREFIX}{name}_sum{{{labels}}} {hist.sum:.6f}')
+                    lines.append(f'{PREFIX}{name}_count{{{labels}}} {hist.count}')
+            lines += [f'# HELP {PREFIX}n_plus_one_total Requêtes HTTP où une même requête SQL a été répétée',
+                      f'# TYPE {PREFIX}n_plus_one_total counter']
+            for endpoint, count in sorted(self.n_plus_one.items()):
+                lines.append(f'{PREFIX}n_plus_one_total{{endpoint="{endpoint}",worker="{worker}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def init_app(app):
+    app.config.setdefault('METRICS_ENABLED', os.environ.get('METRICS_ENABLED', '0') == '1')
+    # Une même requête SQL exécutée au moins N fois dans une requête HTTP = N+1 probable
+    app.config.setdefault('METRICS_N_PLUS_ONE', int(os.environ.get('METRICS_N_PLUS_ONE', 5)))
+    # Jeton pour un collecteur Prometheus (Authorization: Bearer …), en plus de la session admin
+    app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN', ''))
+    if not app.config['METRICS_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start)
+    app.after_request(_finish)
+
+
+def _current():
+    return g.get('_metrics') if has_request_context() else None
+
+
+def _start():
+    g._metrics = {'start': time.perf_counter(), 'sql': 0.0, 'statements': Counter(),
+                  'tpl': 0.0, 'tpl_stack': []}
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    state = _current()
+    starts = conn.info.get('metrics_start')
+    if state is None or not starts:
+        return
+    state['sql'] += time.perf_counter() - starts.pop()
+    state['statements'][statement] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    state = _current()
+    if state is not None:
+        state['tpl_stack'].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    state = _current()
+    if state is not None and state['tpl_stack']:
+        started = state['tpl_stack'].pop()
+        # Rendus imbriqués : seul le plus externe est compté
+        if not state['tpl_stack']:
+            state['tpl'] += time.perf_counter() - started
+
+
+def _finish(response):
+    state = g.pop('_metrics', None)
+    if state is None:
+        return response
+    total = time.perf_counter() - state['start']
+    # Endpoint plutôt que chemin : cardinalité bornée (404 regroupées)
+    endpoint = request.endpoint or 'unmatched'
+    queries = sum(state['statements'].values())
+
+    registry.observe('request_duration_seconds', endpoint, total)
+    registry.observe('sql_queries', endpoint, queries)
+    registry.observe('sql_duration_seconds', endpoint, state['sql'])
+    registry.observe('template_duration_seconds', endpoint, state['tpl'])
+    if not response.is_streamed:
+        registry.observe('response_bytes', endpoint, response.calculate_content_length() or 0)
+
+    threshold = current_app.config['METRICS_N_PLUS_ONE']
+    repeated = [(sql, n) for sql, n in state['statements'].items() if n >= threshold]
+    if repeated:
+        registry.flag_n_plus_one(endpoint)
+        for sql, n in repeated:
+            log.warning('N+1 probable sur %s : %d exécutions de %s', endpoint, n, ' '.join(sql.split())[:200])
+
+    response.headers.add('Server-Timing', ', '.join([
+        f'db;dur={state["sql"] * 1000:.1f};desc="{queries} SQL"',
+        f'tpl;dur={state["tpl"] * 1000:.1f};desc="templates"',
+        f'app;dur={total * 1000:.1f};desc="{endpoint}"',
+    ]))
+    return response
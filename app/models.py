@@ -1,6 +1,7 @@
 from datetime import datetime
 from flask_login import UserMixin
-from . import db
+from sqlalchemy.orm import Session, object_session
+from . import db, user_cache
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -11,8 +12,42 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class UserIdentity(UserMixin):
+    # Copie en lecture seule d'un User, gardée dans user_cache pour current_user
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.is_admin = bool(user.is_admin)
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    # Mot de passe, droits admin… : la copie en cache n'est plus valable.
+    # Ce worker l'oublie tout de suite, les autres au commit (tampon partagé)
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info['users_changed'] = True
+
+@db.event.listens_for(Session, 'after_commit')
+def _users_committed(session):
+    # Après le commit seulement : un autre worker ne peut plus relire l'ancienne ligne
+    if session.info.pop('users_changed', False):
+        user_cache.changed()
+
+@db.event.listens_for(Session, 'after_rollback')
+def _users_rolled_back(session):
+    session.info.pop('users_changed', None)
+
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        # Accueil : publiés, les plus récents d'abord
+        db.Index('ix_articles_published_created', 'is_published', 'created_at'),
+        # Listes admin (pagination par clé) et tableau de bord
+        db.Index('ix_articles_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(200), unique=True, nullable=False)
@@ -23,9 +58,20 @@ class Article(db.Model):
     is_published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Calculés à l'enregistrement par content.prepare()
+    content_html = db.Column(db.Text)
+    content_text = db.Column(db.Text)
+    summary = db.Column(db.Text)
+    word_count = db.Column(db.Integer, default=0)
+    reading_time = db.Column(db.Integer, default=1)
+    render_version = db.Column(db.Integer)
 
 class Defi(db.Model):
     __tablename__ = 'defis'  
+    __table_args__ = (
+        db.Index('ix_defis_active_created', 'is_active', 'created_at'),
+        db.Index('ix_defis_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -42,6 +88,10 @@ class Defi(db.Model):
 
 class SolidariteAction(db.Model):
     __tablename__ = 'solidarite_action'
+    __table_args__ = (
+        db.Index('ix_solidarite_action_active_featured', 'is_active', 'is_featured'),
+        db.Index('ix_solidarite_action_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -54,6 +104,9 @@ class SolidariteAction(db.Model):
 
 class ForumTopic(db.Model):
     __tablename__ = 'forum_topics'
+    __table_args__ = (
+        db.Index('ix_forum_topics_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     excerpt = db.Column(db.Text)
@@ -67,7 +120,43 @@ class ForumTopic(db.Model):
 
 class Newsletter(db.Model):
     __tablename__ = 'newsletter'
+    __table_args__ = (
+        # Abonnés actifs : comptage en parcours d'index seul
+        db.Index('ix_newsletter_active_created', 'is_active', 'created_at'),
+        db.Index('ix_newsletter_created_id', 'created_at', 'id'),
+        # Unicité insensible à la casse (les adresses sont stockées en minuscules)
+        db.Index('uq_newsletter_email_lower', db.func.lower(db.text('email')), unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Counter(db.Model):
+    # Compteurs du tableau de bord, tenus à jour par les handlers (voir counters.py)
+    __tablename__ = 'counters'
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class Campaign(db.Model):
+    # Envoi de la newsletter (voir mailing.py) ; cursor = dernier abonné traité, pour la reprise
+    __tablename__ = 'campaigns'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='draft')  # draft, sending, paused, done
+    cursor = db.Column(db.Integer, nullable=False, default=0)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class CampaignFailure(db.Model):
+    # Destinataires en échec définitif (refus du serveur, ou après toutes les tentatives)
+    __tablename__ = 'campaign_failures'
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False, index=True)
+    email = db.Column(db.String(120), nullable=False)
+    error = db.Column(db.String(300))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
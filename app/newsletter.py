@@ -0,0 +1,216 @@
+import io
+import os
+import csv
+import queue
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import select, update
+from . import db, counters
+from .models import Newsletter
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+EMAIL_HEADERS = {'email', 'e-mail', 'mail', 'courriel', 'adresse', 'adresse email'}
+
+
+def init_app(app):
+    from .ratelimit import TokenBucket
+    app.config.setdefault('NEWSLETTER_RATE_LIMIT', os.environ.get('NEWSLETTER_RATE_LIMIT', '5/60'))
+    app.config.setdefault('NEWSLETTER_BUFFERED', os.environ.get('NEWSLETTER_BUFFERED', '0') == '1')
+    app.extensions['newsletter_limiter'] = TokenBucket.parse(app.config['NEWSLETTER_RATE_LIMIT'])
+    app.extensions['newsletter_buffer'] = SignupBuffer(app) if app.config['NEWSLETTER_BUFFERED'] else None
+
+
+def dialect_insert(table):
+    # INSERT ... ON CONFLICT : Postgres en production, SQLite en local
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def normalize_email(email):
+    # Adresse unique quelle que soit la casse : Foo@x == foo@x
+    return (email or '').strip().lower()
+
+
+def is_valid_email(email):
+    return bool(email) and '@' in email and len(email) <= 120
+
+
+# ── INSCRIPTION ──
+def subscribe(email):
+    # Un seul INSERT ... ON CONFLICT atomique (pas de SELECT préalable ni de course
+    # entre deux soumissions) ; renvoie 'new', 'reactivated' ou 'existing'.
+    now = datetime.utcnow()
+    table = Newsletter.__table__
+    stmt = dialect_insert(table).values(email=email, is_active=True, created_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['email'],
+        set_={'is_active': True},
+        where=table.c.is_active.is_not(True),
+    ).returning(table.c.created_at)
+    created_at = db.session.execute(stmt).scalar()
+    if created_at is None:
+        # Déjà abonné(e) et actif(ve) : rien n'a été écrit
+        db.session.rollback()
+        return 'existing'
+    counters.bump('subscribers', 1)
+    db.session.commit()
+    # created_at n'est écrit qu'à l'insertion : sinon c'est une réactivation
+    return 'new' if created_at == now else 'reactivated'
+
+
+def unsubscribe(email):
+    # Lien des e-mails de campagne (mailing.py) ; sans effet si déjà désinscrit(e)
+    result = db.session.execute(
+        update(Newsletter).where(Newsletter.email == email, Newsletter.is_active.is_(True)).values(is_active=False)
+    )
+    if result.rowcount:
+        counters.bump('subscribers', -1)
+    db.session.commit()
+    return bool(result.rowcount)
+
+
+class SignupBuffer:
+    # Mode tamponné (NEWSLETTER_BUFFERED) : les inscriptions sont mises en file et
+    # écrites par lots par un thread du worker. Une inscription en file est perdue
+    # si le worker est tué avant l'écriture.
+    def __init__(self, app, batch_size=200, interval=0.5):
+        self.app = app
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def add(self, email):
+        self._ensure_thread()
+        self._queue.put(email)
+
+    def _ensure_thread(self):
+        # Thread démarré à la demande, dans chaque worker (après le fork)
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='newsletter-buffer', daemon=True)
+                self._thread.start()
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=self.interval))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = list(dict.fromkeys(self._take_batch()))
+            self.flush(batch)
+
+    def flush(self, batch):
+        report = {'inserted': 0, 'reactivated': 0, 'duplicates': 0}
+        with self.app.app_context():
+            try:
+                _upsert_batch(batch, report)
+            except Exception:
+                db.session.rollback()
+                log.exception('Écriture de %d inscription(s) impossible', len(batch))
+            finally:
+                db.session.remove()
+        return report
+
+
+# ── EXPORT ──
+def export_rows(batch_size=BATCH_SIZE):
+    # Générateur CSV : curseur côté serveur (stream_results), lignes lues par lots
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['email', 'is_active', 'created_at'])
+    stmt = select(Newsletter.email, Newsletter.is_active, Newsletter.created_at) \
+        .order_by(Newsletter.id) \
+        .execution_options(stream_results=True, yield_per=batch_size)
+    for partition in db.session.execute(stmt).partitions():
+        for email, is_active, created_at in partition:
+            writer.writerow([email, int(bool(is_active)), created_at.isoformat(sep=' ') if created_at else ''])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# ── IMPORT ──
+def _emails(stream):
+    # Lecture incrémentale du CSV ; colonne email repérée par l'en-tête ou par un « @ »
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    column = None
+    for row in csv.reader(text, dialect):
+        if not row:
+            continue
+        if column is None:
+            headers = [cell.strip().lower() for cell in row]
+            column = next((i for i, h in enumerate(headers) if h in EMAIL_HEADERS), None)
+            if column is not None:
+                continue
+            column = next((i for i, cell in enumerate(row) if '@' in cell), 0)
+        yield row[column].strip() if column < len(row) else ''
+
+
+def _upsert_batch(batch, report):
+    existing = dict(db.session.execute(
+        select(Newsletter.email, Newsletter.is_active).where(Newsletter.email.in_(batch))
+    ).all())
+    to_write = []
+    for email in batch:
+        if email not in existing:
+            report['inserted'] += 1
+        elif not existing[email]:
+            report['reactivated'] += 1
+        else:
+            report['duplicates'] += 1
+            continue
+        to_write.append({'email': email, 'is_active': True})
+    if to_write:
+        stmt = dialect_insert(Newsletter.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['email'],
+            set_={'is_active': True},
+            where=Newsletter.__table__.c.is_active.is_not(True),
+        )
+        db.session.execute(stmt, to_write)
+        counters.bump('subscribers', len(to_write))
+    db.session.commit()
+
+
+def import_csv(stream, batch_size=BATCH_SIZE):
+    # Upsert par lots ; renvoie {inserted, reactivated, duplicates, invalid}
+    report = {'inserted': 0, 'reactivated': 0, 'duplicates': 0, 'invalid': 0}
+    batch, seen = [], set()
+    for email in _emails(stream):
+        email = normalize_email(email)
+        if not is_valid_email(email):
+            report['invalid'] += 1
+            continue
+        if email in seen:
+            report['duplicates'] += 1
+            continue
+        seen.add(email)
+        batch.append(email)
+        if len(batch) >= batch_size:
+            _upsert_batch(batch, report)
+            batch, seen = [], set()
+    if batch:
+        _upsert_batch(batch, report)
+    return report
@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import tuple_
+
+PAGE_SIZES = (20, 50, 100, 200)
+
+
+# ── PAGINATION PAR CLÉ (keyset) ──
+# Tri sur (created_at, id) décroissant ; le curseur encode la clé de la
+# dernière (ou première) ligne affichée. Coût constant quelle que soit la
+# profondeur de la page, contrairement à OFFSET.
+def encode_cursor(item):
+    raw = f'{item.created_at.isoformat()}|{item.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, id_ = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(id_)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, per_page, has_next, has_prev):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = encode_cursor(items[-1]) if items and has_next else None
+        self.prev_cursor = encode_cursor(items[0]) if items and has_prev else None
+        self.next_args = {'after': self.next_cursor} if self.next_cursor else None
+        self.prev_args = {'before': self.prev_cursor} if self.prev_cursor else None
+
+
+# ── PAGINATION PAR NUMÉRO (résultats de recherche) ──
+# Tri par pertinence, sans clé stable : OFFSET, acceptable sur des résultats
+# déjà filtrés par l'index plein texte.
+class OffsetPage:
+    def __init__(self, items, per_page, number, has_next):
+        self.items = items
+        self.per_page = per_page
+        self.number = number
+        self.has_next = has_next
+        self.next_args = {'page': number + 1} if has_next else None
+        self.prev_args = {'page': number - 1} if number > 1 else None
+
+
+def page_size():
+    default = current_app.config.get('ADMIN_PAGE_SIZE', 50)
+    per_page = request.args.get('per_page', default, type=int)
+    return per_page if per_page in PAGE_SIZES else default
+
+
+def keyset_paginate(query, model, per_page=None):
+    # Lit ?after=<curseur> (page suivante) ou ?before=<curseur> (page précédente)
+    per_page = per_page or page_size()
+    key = tuple_(model.created_at, model.id)
+    after = decode_cursor(request.args.get('after', ''))
+    before = decode_cursor(request.args.get('before', ''))
+
+    if before:
+        rows = query.filter(key > tuple_(*before)) \
+            .order_by(model.created_at.asc(), model.id.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        return KeysetPage(items, per_page, has_next=True, has_prev=has_prev)
+
+    if after:
+        query = query.filter(key < tuple_(*after))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], per_page, has_next=len(rows) > per_page, has_prev=after is not None)
+
+
+def offset_paginate(query, per_page=None):
+    # Lit ?page=<n> (à partir de 1)
+    per_page = per_page or page_size()
+    number = max(1, request.args.get('page', 1, type=int))
+    rows = query.offset((number - 1) * per_page).limit(per_page + 1).all()
+    return OffsetPage(rows[:per_page], per_page, number, has_next=len(rows) > per_page)
@@ -0,0 +1,90 @@
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import tuple_, func
+from . import db, search
+from .models import Article, Defi, SolidariteAction, ForumTopic, Newsletter
+
+
+# ── REQUÊTES CHAUDES ──
+# Partagées par les routes et par la vérification des plans (flask check-indexes) :
+# chaque index de models.py correspond à l'une d'elles.
+def published_articles():
+    return Article.query.filter_by(is_published=True).order_by(Article.created_at.desc())
+
+
+def active_defis():
+    return Defi.query.filter_by(is_active=True).order_by(Defi.created_at.desc())
+
+
+def active_solidarite():
+    return SolidariteAction.query.filter_by(is_active=True).order_by(SolidariteAction.is_featured.desc())
+
+
+def _keyset(model):
+    # Page suivante d'une liste admin (voir pagination.keyset_paginate)
+    return model.query.filter(tuple_(model.created_at, model.id) < tuple_(datetime.utcnow(), 0)) \
+        .order_by(model.created_at.desc(), model.id.desc())
+
+
+HOT_QUERIES = {
+    'index: articles publiés': lambda: published_articles().limit(6),
+    'index: défi actif': lambda: active_defis().limit(1),
+    'index: solidarité': lambda: active_solidarite().limit(4),
+    'admin: articles': lambda: _keyset(Article).limit(51),
+    'admin: défis': lambda: _keyset(Defi).limit(51),
+    'admin: solidarité': lambda: _keyset(SolidariteAction).limit(51),
+    'admin: forum': lambda: _keyset(ForumTopic).limit(51),
+    'admin: newsletter': lambda: _keyset(Newsletter).limit(51),
+    'admin: abonnés actifs': lambda: db.session.query(func.count(Newsletter.id)).filter(Newsletter.is_active.is_(True)),
+    'dashboard: derniers articles': lambda: Article.query.order_by(Article.created_at.desc()).limit(5),
+    'dashboard: derniers abonnés': lambda: Newsletter.query.order_by(Newsletter.created_at.desc()).limit(5),
+    # Recherche plein texte
+    'recherche: articles': lambda: search.search('articles', 'solidarité').limit(10),
+    'recherche: forum': lambda: search.search('topics', 'solidarité').limit(10),
+}
+
+
+# ── VÉRIFICATION DES PLANS ──
+def explain(query):
+    conn = db.session.connection()
+    compiled = query.statement.compile(dialect=conn.dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).fetchall()
+        return [row[-1] for row in rows]
+    rows = conn.exec_driver_sql(f'EXPLAIN {compiled}', params).fetchall()
+    return [row[0] for row in rows]
+
+
+def full_scans(plan, dialect):
+    if dialect == 'sqlite':
+        # « SCAN table » sans index = parcours complet ; « USING (COVERING) INDEX » = ok
+        return [line for line in plan if line.startswith('SCAN ') and 'INDEX' not in line]
+    return [line for line in plan if 'Seq Scan' in line]
+
+
+@click.command('check-indexes')
+@click.option('--verbose', '-v', is_flag=True, help='Afficher les plans complets.')
+@with_appcontext
+def check_indexes_command(verbose):
+    """EXPLAIN des requêtes chaudes ; échoue si l'une d'elles parcourt une table entière."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Sur une petite base Postgres préfère un Seq Scan même avec un index utilisable :
+        # on le pénalise pour vérifier qu'un index existe bien pour chaque requête.
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    failures = 0
+    for name, build in HOT_QUERIES.items():
+        plan = explain(build())
+        scans = full_scans(plan, dialect)
+        click.echo(f"{'ÉCHEC' if scans else 'ok   '} {name}")
+        for line in (plan if verbose else scans):
+            click.echo(f'        {line}')
+        failures += bool(scans)
+    db.session.rollback()
+    if failures:
+        raise click.ClickException(f'{failures} requête(s) sans index.')
@@ -0,0 +1,41 @@
+import time
+import threading
+
+
+# ── LIMITEUR PAR IP (seau à jetons) ──
+# En mémoire, propre à chaque worker : il coupe les rafales avant toute
+# requête SQL. La limite effective est donc multipliée par le nombre de workers.
+class TokenBucket:
+    def __init__(self, capacity, period, max_keys=10000):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec):
+        # « 5/60 » : 5 requêtes, rechargées sur 60 secondes
+        capacity, period = spec.split('/')
+        return cls(int(capacity), float(period))
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed
+
+    def retry_after(self):
+        return max(1, round(1 / self.rate))
+
+    def _prune(self, now):
+        # Les seaux redevenus pleins n'ont plus d'intérêt
+        full = [k for k, (tokens, last) in self._buckets.items()
+                if tokens + (now - last) * self.rate >= self.capacity]
+        for k in full:
+            del self._buckets[k]
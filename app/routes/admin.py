@@ -1,9 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context, abort, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
-from ..models import User, Article, Defi, SolidariteAction, ForumTopic, Newsletter
-from .. import db
-import re, datetime, os, uuid
+from ..models import User, UserIdentity, Article, Defi, SolidariteAction, ForumTopic, Newsletter
+from .. import db, page_cache, user_cache, images, counters, search, content, metrics, freeze, newsletter as newsletter_io
+from ..pagination import keyset_paginate, offset_paginate, PAGE_SIZES
+from sqlalchemy import select, update, delete, or_
+import re, datetime, hmac
 from werkzeug.utils import secure_filename
 
 admin_bp = Blueprint('admin', __name__)
@@ -15,6 +17,25 @@ def slugify(text):
     text = re.sub(r'[\s_-]+', '-', text)
     return text
 
+def unique_slug(title):
+    # Une seule requête : slugs déjà pris parmi « base » et « base-N », puis premier suffixe libre
+    # (slugify ne laisse ni % ni _ : rien à échapper dans le LIKE)
+    base = slugify(title)
+    taken = set(db.session.scalars(
+        select(Article.slug).where(or_(Article.slug == base, Article.slug.like(f'{base}-%')))
+    ))
+    slug, counter = base, 1
+    while slug in taken:
+        slug = f"{base}-{counter}"
+        counter += 1
+    return slug
+
+def content_changed():
+    # Contenu public modifié → nouvelle version (ETag), cache des pages vidé, pages figées re-rendues
+    counters.bump_version()
+    page_cache.clear()
+    freeze.schedule()
+
 def admin_required(f):
     from functools import wraps
     @wraps(f)
@@ -24,17 +45,47 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
-UPLOAD_FOLDER = 'static/uploads'
+# ── ACTIONS GROUPÉES ──
+# Cases cochées d'une liste → une seule requête UPDATE/DELETE ... WHERE id IN (...),
+# compteurs et index de recherche ajustés dans la même transaction, caches invalidés une fois.
+def selected_ids():
+    return sorted({int(v) for v in request.form.getlist('ids') if v.isdigit()})
+
+def bulk_update(model, ids, values, *where):
+    stmt = update(model).where(model.id.in_(ids), *where).values(**values)
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+def bulk_delete(model, ids):
+    stmt = delete(model).where(model.id.in_(ids))
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+def bulk_content(model, counter, actions, endpoint, indexed=False):
+    ids, action = selected_ids(), request.form.get('action')
+    if not ids or (action != 'delete' and action not in actions):
+        flash('Sélectionnez au moins une ligne et une action.', 'error')
+        return redirect(url_for(endpoint))
+    if action == 'delete':
+        if indexed:
+            search.remove_ids(model, ids)
+        count = bulk_delete(model, ids)
+        counters.bump(counter, -count)
+        message = f'{count} élément(s) supprimé(s).'
+    else:
+        count = bulk_update(model, ids, actions[action])
+        message = f'{count} élément(s) mis à jour ✦'
+    db.session.commit()
+    content_changed()
+    flash(message, 'info' if action == 'delete' else 'success')
+    return redirect(url_for(endpoint))
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif'}
 
 def save_image(file):
     if file and file.filename and '.' in file.filename:
         ext = file.filename.rsplit('.', 1)[1].lower()
         if ext in ALLOWED_EXTENSIONS:
-            unique_name = f"{uuid.uuid4().hex}.{ext}"
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            file.save(os.path.join(UPLOAD_FOLDER, unique_name))
-            return f"/static/uploads/{unique_name}"
+            # Stockage dédupliqué par empreinte, variantes WebP/JPEG en arrière-plan
+            return images.store_upload(file, ext)
     return None
 
 # ── AUTH ──
@@ -48,6 +99,7 @@ def login():
         user = User.query.filter_by(email=email, is_admin=True).first()
         if user and check_password_hash(user.password, password):
             login_user(user)
+            user_cache.set(user.id, UserIdentity(user))
             return redirect(url_for('admin.dashboard'))
         flash('Email ou mot de passe incorrect.', 'error')
     return render_template('admin/login.html')
@@ -55,6 +107,7 @@ def login():
 @admin_bp.route('/logout')
 @login_required
 def logout():
+    user_cache.invalidate(current_user.id)
     logout_user()
     return redirect(url_for('admin.login'))
 
@@ -62,13 +115,8 @@ def logout():
 @admin_bp.route('/')
 @admin_required
 def dashboard():
-    stats = {
-        'articles':    Article.query.count(),
-        'defis':       Defi.query.count(),
-        'solidarite':  SolidariteAction.query.count(),
-        'topics':      ForumTopic.query.count(),
-        'subscribers': Newsletter.query.filter_by(is_active=True).count(),
-    }
+    # Statistiques : une seule lecture de la table counters
+    stats = counters.snapshot()
     recent_articles    = Article.query.order_by(Article.created_at.desc()).limit(5).all()
     recent_subscribers = Newsletter.query.order_by(Newsletter.created_at.desc()).limit(5).all()
     recent_defis       = Defi.query.order_by(Defi.created_at.desc()).limit(5).all()
@@ -81,24 +129,36 @@ def dashboard():
         recent_solidarite=recent_solidarite
     )
 
+# ── MÉTRIQUES ──
+@admin_bp.route('/metrics')
+def metrics_export():
+    # Session admin, ou jeton METRICS_TOKEN pour un collecteur Prometheus
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (token and hmac.compare_digest(bearer, token)) and not (current_user.is_authenticated and current_user.is_admin):
+        abort(403)
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ── ARTICLES ──
 @admin_bp.route('/articles')
 @admin_required
 def articles():
-    items = Article.query.order_by(Article.created_at.desc()).all()
-    return render_template('admin/articles.html', items=items)
+    query = request.args.get('q', '').strip()
+    if query:
+        # Recherche plein texte, brouillons compris, triée par pertinence
+        page = offset_paginate(search.search('articles', query, visible_only=False))
+    else:
+        page = keyset_paginate(Article.query, Article)
+    return render_template('admin/articles.html', items=page.items, page=page, page_sizes=PAGE_SIZES, query=query)
 
 @admin_bp.route('/articles/new', methods=['GET', 'POST'])
 @admin_required
 def article_new():
     if request.method == 'POST':
         title = request.form.get('title')
-        slug = slugify(title)
-        base_slug = slug
-        counter = 1
-        while Article.query.filter_by(slug=slug).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+        slug = unique_slug(title)
 
         # Gestion image upload OU URL
         image_file = request.files.get('image_url')
@@ -113,8 +173,13 @@ def article_new():
             image_url=image,
             is_published=bool(request.form.get('is_published'))
         )
+        # HTML, texte brut, résumé et temps de lecture calculés une fois ici
+        content.prepare(art)
         db.session.add(art)
+        counters.bump('articles', 1)
+        search.index(art)
         db.session.commit()
+        content_changed()
         flash('Article publié avec succès ✦', 'success')
         return redirect(url_for('admin.articles'))
     return render_template('admin/article_form.html', item=None)
@@ -138,7 +203,10 @@ def article_edit(id):
         elif request.form.get('image_url_text'):
             art.image_url = request.form.get('image_url_text')
 
+        content.prepare(art)
+        search.index(art)
         db.session.commit()
+        content_changed()
         flash('Article mis à jour ✦', 'success')
         return redirect(url_for('admin.articles'))
     return render_template('admin/article_form.html', item=art)
@@ -147,17 +215,30 @@ def article_edit(id):
 @admin_required
 def article_delete(id):
     art = Article.query.get_or_404(id)
+    search.remove(art)
     db.session.delete(art)
+    counters.bump('articles', -1)
     db.session.commit()
+    content_changed()
     flash('Article supprimé.', 'info')
     return redirect(url_for('admin.articles'))
 
+ARTICLE_ACTIONS = {
+    'publish':   {'is_published': True},
+    'unpublish': {'is_published': False},
+}
+
+@admin_bp.route('/articles/bulk', methods=['POST'])
+@admin_required
+def articles_bulk():
+    return bulk_content(Article, 'articles', ARTICLE_ACTIONS, 'admin.articles', indexed=True)
+
 # ── DÉFIS ──
 @admin_bp.route('/defis')
 @admin_required
 def defis():
-    items = Defi.query.order_by(Defi.created_at.desc()).all()
-    return render_template('admin/defis.html', items=items)
+    page = keyset_paginate(Defi.query, Defi)
+    return render_template('admin/defis.html', items=page.items, page=page, page_sizes=PAGE_SIZES)
 
 @admin_bp.route('/defis/new', methods=['GET', 'POST'])
 @admin_required
@@ -179,7 +260,9 @@ def defi_new():
             is_active=bool(request.form.get('is_active'))
         )
         db.session.add(defi)
+        counters.bump('defis', 1)
         db.session.commit()
+        content_changed()
         flash('Défi créé ✦', 'success')
         return redirect(url_for('admin.defis'))
     return render_template('admin/defi_form.html', item=None)
@@ -206,6 +289,7 @@ def defi_edit(id):
             defi.image_url = request.form.get('image_url_text')
 
         db.session.commit()
+        content_changed()
         flash('Défi mis à jour ✦', 'success')
         return redirect(url_for('admin.defis'))
     return render_template('admin/defi_form.html', item=defi)
@@ -215,16 +299,28 @@ def defi_edit(id):
 def defi_delete(id):
     defi = Defi.query.get_or_404(id)
     db.session.delete(defi)
+    counters.bump('defis', -1)
     db.session.commit()
+    content_changed()
     flash('Défi supprimé.', 'info')
     return redirect(url_for('admin.defis'))
 
+DEFI_ACTIONS = {
+    'activate':   {'is_active': True},
+    'deactivate': {'is_active': False},
+}
+
+@admin_bp.route('/defis/bulk', methods=['POST'])
+@admin_required
+def defis_bulk():
+    return bulk_content(Defi, 'defis', DEFI_ACTIONS, 'admin.defis')
+
 # ── SOLIDARITÉ ──
 @admin_bp.route('/solidarite')
 @admin_required
 def solidarite():
-    items = SolidariteAction.query.order_by(SolidariteAction.created_at.desc()).all()
-    return render_template('admin/solidarite.html', items=items)
+    page = keyset_paginate(SolidariteAction.query, SolidariteAction)
+    return render_template('admin/solidarite.html', items=page.items, page=page, page_sizes=PAGE_SIZES)
 
 @admin_bp.route('/solidarite/new', methods=['GET', 'POST'])
 @admin_required
@@ -243,7 +339,9 @@ def solidarite_new():
             is_active=bool(request.form.get('is_active'))
         )
         db.session.add(action)
+        counters.bump('solidarite', 1)
         db.session.commit()
+        content_changed()
         flash('Action de solidarité créée ✦', 'success')
         return redirect(url_for('admin.solidarite'))
     return render_template('admin/solidarite_form.html', item=None)
@@ -267,6 +365,7 @@ def solidarite_edit(id):
             action.image_url = request.form.get('image_url_text')
 
         db.session.commit()
+        content_changed()
         flash('Action mise à jour ✦', 'success')
         return redirect(url_for('admin.solidarite'))
     return render_template('admin/solidarite_form.html', item=action)
@@ -276,16 +375,34 @@ def solidarite_edit(id):
 def solidarite_delete(id):
     action = SolidariteAction.query.get_or_404(id)
     db.session.delete(action)
+    counters.bump('solidarite', -1)
     db.session.commit()
+    content_changed()
     flash('Action supprimée.', 'info')
     return redirect(url_for('admin.solidarite'))
 
+SOLIDARITE_ACTIONS = {
+    'activate':   {'is_active': True},
+    'deactivate': {'is_active': False},
+    'feature':    {'is_featured': True},
+    'unfeature':  {'is_featured': False},
+}
+
+@admin_bp.route('/solidarite/bulk', methods=['POST'])
+@admin_required
+def solidarite_bulk():
+    return bulk_content(SolidariteAction, 'solidarite', SOLIDARITE_ACTIONS, 'admin.solidarite')
+
 # ── FORUM ──
 @admin_bp.route('/forum')
 @admin_required
 def forum():
-    items = ForumTopic.query.order_by(ForumTopic.created_at.desc()).all()
-    return render_template('admin/forum.html', items=items)
+    query = request.args.get('q', '').strip()
+    if query:
+        page = offset_paginate(search.search('topics', query, visible_only=False))
+    else:
+        page = keyset_paginate(ForumTopic.query, ForumTopic)
+    return render_template('admin/forum.html', items=page.items, page=page, page_sizes=PAGE_SIZES, query=query)
 
 @admin_bp.route('/forum/new', methods=['GET', 'POST'])
 @admin_required
@@ -302,7 +419,10 @@ def forum_new():
             is_visible=bool(request.form.get('is_visible'))
         )
         db.session.add(topic)
+        counters.bump('topics', 1)
+        search.index(topic)
         db.session.commit()
+        content_changed()
         flash('Sujet créé ✦', 'success')
         return redirect(url_for('admin.forum'))
     return render_template('admin/forum_form.html', item=None)
@@ -320,7 +440,9 @@ def forum_edit(id):
         topic.is_hot      = bool(request.form.get('is_hot'))
         topic.reply_count = int(request.form.get('reply_count', 0))
         topic.is_visible  = bool(request.form.get('is_visible'))
+        search.index(topic)
         db.session.commit()
+        content_changed()
         flash('Sujet mis à jour ✦', 'success')
         return redirect(url_for('admin.forum'))
     return render_template('admin/forum_form.html', item=topic)
@@ -329,24 +451,63 @@ def forum_edit(id):
 @admin_required
 def forum_delete(id):
     topic = ForumTopic.query.get_or_404(id)
+    search.remove(topic)
     db.session.delete(topic)
+    counters.bump('topics', -1)
     db.session.commit()
+    content_changed()
     flash('Sujet supprimé.', 'info')
     return redirect(url_for('admin.forum'))
 
+FORUM_ACTIONS = {
+    'show':  {'is_visible': True},
+    'hide':  {'is_visible': False},
+    'pin':   {'is_pinned': True},
+    'unpin': {'is_pinned': False},
+}
+
+@admin_bp.route('/forum/bulk', methods=['POST'])
+@admin_required
+def forum_bulk():
+    return bulk_content(ForumTopic, 'topics', FORUM_ACTIONS, 'admin.forum', indexed=True)
+
 # ── NEWSLETTER ──
 @admin_bp.route('/newsletter')
 @admin_required
 def newsletter():
-    items = Newsletter.query.order_by(Newsletter.created_at.desc()).all()
-    active_count = Newsletter.query.filter_by(is_active=True).count()
-    return render_template('admin/newsletter.html', items=items, active_count=active_count)
+    page = keyset_paginate(Newsletter.query, Newsletter)
+    active_count = counters.snapshot()['subscribers']
+    return render_template('admin/newsletter.html', items=page.items, page=page, page_sizes=PAGE_SIZES,
+                           active_count=active_count)
+
+@admin_bp.route('/newsletter/export.csv')
+@admin_required
+def newsletter_export():
+    filename = f"newsletter-{datetime.date.today().isoformat()}.csv"
+    return Response(
+        stream_with_context(newsletter_io.export_rows()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@admin_bp.route('/newsletter/import', methods=['POST'])
+@admin_required
+def newsletter_import():
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('Aucun fichier CSV sélectionné.', 'error')
+        return redirect(url_for('admin.newsletter'))
+    report = newsletter_io.import_csv(file.stream)
+    flash(f"Import terminé : {report['inserted']} ajouté(s), {report['reactivated']} réactivé(s), "
+          f"{report['duplicates']} doublon(s), {report['invalid']} invalide(s).", 'success')
+    return redirect(url_for('admin.newsletter'))
 
 @admin_bp.route('/newsletter/<int:id>/toggle', methods=['POST'])
 @admin_required
 def newsletter_toggle(id):
     sub = Newsletter.query.get_or_404(id)
     sub.is_active = not sub.is_active
+    counters.bump('subscribers', 1 if sub.is_active else -1)
     db.session.commit()
     return redirect(url_for('admin.newsletter'))
 
@@ -355,6 +516,32 @@ def newsletter_toggle(id):
 def newsletter_delete(id):
     sub = Newsletter.query.get_or_404(id)
     db.session.delete(sub)
+    if sub.is_active:
+        counters.bump('subscribers', -1)
     db.session.commit()
     flash('Abonné supprimé.', 'info')
     return redirect(url_for('admin.newsletter'))
+
+@admin_bp.route('/newsletter/bulk', methods=['POST'])
+@admin_required
+def newsletter_bulk():
+    ids, action = selected_ids(), request.form.get('action')
+    if ids and action in ('activate', 'deactivate'):
+        # Seules les lignes qui changent d'état sont touchées : rowcount = variation du compteur
+        active = action == 'activate'
+        changed = Newsletter.is_active.is_not(True) if active else Newsletter.is_active.is_(True)
+        count = bulk_update(Newsletter, ids, {'is_active': active}, changed)
+        counters.bump('subscribers', count if active else -count)
+        message = f'{count} abonné(s) {"réactivé(s)" if active else "désactivé(s)"}.'
+    elif ids and action == 'delete':
+        # Un seul DELETE ; RETURNING dit lesquelles des lignes supprimées comptaient comme actives
+        stmt = delete(Newsletter).where(Newsletter.id.in_(ids)).returning(Newsletter.is_active)
+        deleted = db.session.execute(stmt.execution_options(synchronize_session=False)).scalars().all()
+        counters.bump('subscribers', -sum(1 for active in deleted if active))
+        message = f'{len(deleted)} abonné(s) supprimé(s).'
+    else:
+        flash('Sélectionnez au moins une ligne et une action.', 'error')
+        return redirect(url_for('admin.newsletter'))
+    db.session.commit()
+    flash(message, 'info')
+    return redirect(url_for('admin.newsletter'))
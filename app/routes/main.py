@@ -1,21 +1,138 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from ..models import Article, Defi, SolidariteAction, Newsletter
+import os, hashlib
+from datetime import datetime, timezone
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, make_response, jsonify
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from werkzeug.http import is_resource_modified
+from ..models import Article
+from .. import db, page_cache, newsletter, search, counters
+from ..queries import published_articles, active_defis, active_solidarite
+from ..pagination import offset_paginate
 
 main_bp = Blueprint('main', __name__)
 
+INDEX_CACHE_KEY = 'page:index'
+SEARCH_PAGE_SIZE = 10
+
+# ── VALIDATEURS HTTP (ETag / Last-Modified) ──
+def content_validators(version, *templates):
+    # Version du contenu + date des templates (un déploiement change l'ETag)
+    folder = os.path.join(current_app.root_path, current_app.template_folder)
+    stamps = [version] + [os.path.getmtime(os.path.join(folder, t)) for t in templates]
+    etag = hashlib.md5(':'.join(f'{s:.6f}' for s in stamps).encode()).hexdigest()[:20]
+    last_modified = datetime.fromtimestamp(int(max(stamps)), timezone.utc)
+    return etag, last_modified
+
+def is_not_modified(etag, last_modified):
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+def with_validators(response, etag, last_modified):
+    response = make_response(response)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Le navigateur / CDN peut garder la page mais doit revalider à chaque fois
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
 @main_bp.route('/')
 def index():
-    # Derniers articles
-    articles = Article.query.filter_by(is_published=True).order_by(Article.created_at.desc()).limit(6).all()
+    # Des messages flash en attente sont affichés dans la page : rendu direct
+    if '_flashes' in session:
+        response = make_response(_render_index())
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+
+    # Requête conditionnelle : 304 avant tout rendu (version du contenu relue au plus toutes les
+    # CONTENT_VERSION_TTL secondes)
+    version = counters.version()
+    etag, last_modified = content_validators(version, 'index.html')
+    if is_not_modified(etag, last_modified):
+        return with_validators(('', 304), etag, last_modified)
+
+    # Clé par version : le cache local d'un hôte n'est jamais plus vieux que la version annoncée
+    key = f'{INDEX_CACHE_KEY}:{version}'
+    html = page_cache.get(key)
+    if html is None:
+        html = _render_index()
+        page_cache.set(key, html)
+    return with_validators(html, etag, last_modified)
+
+def _render_index():
+    # Derniers articles (colonnes des cartes seulement, le contenu est chargé à l'ouverture)
+    articles = published_articles().options(
+        load_only(Article.title, Article.slug, Article.tag, Article.summary, Article.image_url)
+    ).limit(6).all()
     
     # Défi actif
-    defi = Defi.query.filter_by(is_active=True).order_by(Defi.created_at.desc()).first()
+    defi = active_defis().first()
     
     # Actions de solidarité
-    solidarite = SolidariteAction.query.filter_by(is_active=True).order_by(SolidariteAction.is_featured.desc()).limit(4).all()
+    solidarite = active_solidarite().limit(4).all()
     
     return render_template('index.html', articles=articles, defi=defi, solidarite=solidarite)
 
+# Contenu d'un article (JSON), chargé à la demande par la modale de l'accueil
+@main_bp.route('/api/articles/<slug>')
+def article_json(slug):
+    art = Article.query.options(load_only(Article.id, Article.updated_at, Article.created_at, Article.render_version)) \
+        .filter_by(slug=slug, is_published=True).first_or_404()
+    stamp = art.updated_at or art.created_at
+    etag = hashlib.md5(f'{art.id}:{stamp.isoformat()}:{art.render_version}'.encode()).hexdigest()[:20]
+    last_modified = stamp.replace(tzinfo=timezone.utc)
+    if is_not_modified(etag, last_modified):
+        return with_validators(('', 304), etag, last_modified)
+    # Validation sur les colonnes légères ; contenu de la réponse relu en une seule requête
+    row = payload_rows([art.id]).one()
+    return with_validators(jsonify(article_payload(row)), etag, last_modified)
+
+# Colonnes de la réponse JSON, partagées avec les pages figées (freeze.py)
+PAYLOAD_COLUMNS = (Article.title, Article.slug, Article.tag, Article.image_url,
+                   Article.content_html, Article.reading_time, Article.word_count)
+
+def payload_rows(ids):
+    # Tuples (pas d'objets ORM) : une requête quel que soit le nombre de colonnes lues
+    return db.session.execute(select(*PAYLOAD_COLUMNS).where(Article.id.in_(ids)))
+
+def article_payload(art):
+    return dict(
+        title=art.title,
+        slug=art.slug,
+        tag=art.tag,
+        image_url=art.image_url,
+        html=art.content_html or '',
+        reading_time=art.reading_time,
+        word_count=art.word_count,
+    )
+
+# Recherche plein texte (JSON) : ?q=…&type=articles|topics&page=n
+@main_bp.route('/api/search')
+def search_json():
+    q = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'articles')
+    if kind not in search.SOURCES:
+        kind = 'articles'
+    # Résultats valables tant que le contenu ne change pas : 304 sans recherche
+    version = counters.version()
+    etag = hashlib.md5(f'{version:.6f}:{request.query_string.decode()}'.encode()).hexdigest()[:20]
+    last_modified = datetime.fromtimestamp(int(version), timezone.utc)
+    if is_not_modified(etag, last_modified):
+        return with_validators(('', 304), etag, last_modified)
+
+    page = offset_paginate(search.search(kind, q), per_page=SEARCH_PAGE_SIZE)
+    if kind == 'articles':
+        results = [dict(title=a.title, slug=a.slug, tag=a.tag, excerpt=a.summary, image_url=a.image_url,
+                        url=url_for('main.article_redirect', slug=a.slug)) for a in page.items]
+    else:
+        results = [dict(title=t.title, category=t.category, excerpt=t.excerpt, author_name=t.author_name,
+                        reply_count=t.reply_count) for t in page.items]
+    return with_validators(jsonify(
+        query=q,
+        type=kind,
+        page=page.number,
+        has_next=page.has_next,
+        results=results,
+    ), etag, last_modified)
+
 # Redirection ancienne route articles → index
 @main_bp.route('/articles')
 def articles_redirect():
@@ -30,22 +147,47 @@ def article_redirect(slug):
 # Newsletter
 @main_bp.route('/newsletter', methods=['POST'])
 def newsletter_subscribe():
-    email = request.form.get('email', '').strip()
-    if not email or '@' not in email:
+    # Rafales rejetées avant tout accès à la base (ni flash, ni rendu de l'accueil)
+    limiter = current_app.extensions['newsletter_limiter']
+    if not limiter.allow(request.remote_addr):
+        return 'Trop de tentatives, réessayez dans un instant.', 429, {'Retry-After': str(limiter.retry_after())}
+
+    email = newsletter.normalize_email(request.form.get('email'))
+    if not newsletter.is_valid_email(email):
         flash('Email invalide.', 'error')
         return redirect(url_for('main.index') + '#newsletter')
-    from .. import db
-    existing = Newsletter.query.filter_by(email=email).first()
-    if existing:
-        if not existing.is_active:
-            existing.is_active = True
-            db.session.commit()
-            flash('Vous êtes de nouveau abonné(e) ! ✦', 'success')
-        else:
-            flash('Vous êtes déjà abonné(e) !', 'info')
-    else:
-        sub = Newsletter(email=email)
-        db.session.add(sub)
-        db.session.commit()
+
+    buffer = current_app.extensions['newsletter_buffer']
+    if buffer is not None:
+        # Mode tamponné : écriture groupée en arrière-plan
+        buffer.add(email)
+        flash('Merci ! Vous êtes maintenant abonné(e) ✦', 'success')
+        return redirect(url_for('main.index') + '#newsletter')
+
+    status = newsletter.subscribe(email)
+    if status == 'new':
         flash('Merci ! Vous êtes maintenant abonné(e) ✦', 'success')
+    elif status == 'reactivated':
+        flash('Vous êtes de nouveau abonné(e) ! ✦', 'success')
+    else:
+        flash('Vous êtes déjà abonné(e) !', 'info')
+    return redirect(url_for('main.index') + '#newsletter')
+
+# Désinscription depuis un e-mail de campagne : le lien (GET) affiche une confirmation,
+# seul un POST désinscrit (formulaire de confirmation, ou « un clic » RFC 8058 des messageries)
+@main_bp.route('/newsletter/unsubscribe/<token>', methods=['GET', 'POST'])
+def newsletter_unsubscribe(token):
+    from ..mailing import email_from_token
+    email = email_from_token(token)
+    if email is None:
+        flash('Lien de désinscription invalide.', 'error')
+        return redirect(url_for('main.index') + '#newsletter')
+    if request.method == 'GET':
+        response = make_response(render_template('unsubscribe.html', email=email, token=token))
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+    newsletter.unsubscribe(email)
+    if request.form.get('List-Unsubscribe') == 'One-Click':
+        return '', 204
+    flash('Vous êtes désinscrit(e) de la newsletter.', 'info')
     return redirect(url_for('main.index') + '#newsletter')
@@ -0,0 +1,136 @@
+import re
+from collections import namedtuple
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, text, table, column, literal_column, bindparam
+from . import db
+from .models import Article, ForumTopic
+
+
+# ── RECHERCHE PLEIN TEXTE ──
+# Postgres : colonne search_vector (tsvector, racinisation française) + index GIN.
+# SQLite (local) : table virtuelle FTS5 <table>_fts dont le rowid est l'id.
+# Comme pour les compteurs, les handlers admin appellent index() / remove()
+# avant leur commit : l'index change dans la même transaction que le contenu.
+LANGUAGE = 'french'
+MIN_LENGTH = 2
+MAX_TERMS = 8
+
+# Poids des colonnes : A (titre) > B > C > D ; équivalents bm25 pour FTS5
+WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+Source = namedtuple('Source', 'model fields visible')
+
+SOURCES = {
+    'articles': Source(Article, (('title', 'A'), ('tag', 'B'), ('excerpt', 'C'), ('content_text', 'D')),
+                       lambda: Article.is_published.is_(True)),
+    'topics': Source(ForumTopic, (('title', 'A'), ('category', 'B'), ('excerpt', 'C')),
+                     lambda: ForumTopic.is_visible.is_(True)),
+}
+
+
+def _postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _source(obj):
+    return next(s for s in SOURCES.values() if isinstance(obj, s.model))
+
+
+def vector_sql(source):
+    return ' || '.join(
+        f"setweight(to_tsvector('{LANGUAGE}', coalesce({name}, '')), '{weight}')"
+        for name, weight in source.fields
+    )
+
+
+def _fts_sql(source, where=''):
+    tablename = source.model.__tablename__
+    names = ', '.join(name for name, _ in source.fields)
+    return f'INSERT INTO {tablename}_fts (rowid, {names}) SELECT id, {names} FROM {tablename} {where}'
+
+
+# ── MISE À JOUR DE L'INDEX ──
+def index(obj):
+    source = _source(obj)
+    tablename = source.model.__tablename__
+    # Ligne écrite (et id connu) avant de calculer son vecteur
+    db.session.flush()
+    if _postgres():
+        db.session.execute(text(
+            f'UPDATE {tablename} SET search_vector = {vector_sql(source)} WHERE id = :id'
+        ), {'id': obj.id})
+    else:
+        db.session.execute(text(f'DELETE FROM {tablename}_fts WHERE rowid = :id'), {'id': obj.id})
+        db.session.execute(text(_fts_sql(source, 'WHERE id = :id')), {'id': obj.id})
+
+
+def remove(obj):
+    remove_ids(_source(obj).model, [obj.id])
+
+
+def remove_ids(model, ids):
+    # Postgres : le vecteur disparaît avec la ligne ; FTS5 : un seul DELETE pour toute la sélection
+    if ids and not _postgres():
+        db.session.execute(
+            text(f'DELETE FROM {model.__tablename__}_fts WHERE rowid IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(ids)},
+        )
+
+
+def reindex():
+    counts = {}
+    for kind, source in SOURCES.items():
+        tablename = source.model.__tablename__
+        if _postgres():
+            result = db.session.execute(text(f'UPDATE {tablename} SET search_vector = {vector_sql(source)}'))
+        else:
+            db.session.execute(text(f'DELETE FROM {tablename}_fts'))
+            result = db.session.execute(text(_fts_sql(source)))
+        counts[kind] = result.rowcount
+    return counts
+
+
+# ── REQUÊTES ──
+def terms(q):
+    # Mots de la saisie, chacun en préfixe (recherche pendant la frappe)
+    words = re.findall(r'\w+', (q or '').lower())
+    return [w for w in words if len(w) >= MIN_LENGTH][:MAX_TERMS]
+
+
+def search(kind, q, visible_only=True):
+    # Requête triée par pertinence (à paginer) ; aucune ligne si la saisie est vide
+    source = SOURCES[kind]
+    model = source.model
+    words = terms(q)
+    if not words:
+        return model.query.filter(db.false())
+    if _postgres():
+        vector = literal_column(f'{model.__tablename__}.search_vector')
+        tsquery = func.to_tsquery(LANGUAGE, ' & '.join(f'{w}:*' for w in words))
+        query = model.query.filter(vector.op('@@')(tsquery)) \
+            .order_by(func.ts_rank_cd(vector, tsquery).desc(), model.id.desc())
+    else:
+        name = f'{model.__tablename__}_fts'
+        fts = table(name, column('rowid'))
+        weights = [WEIGHTS[weight] for _, weight in source.fields]
+        query = model.query.join(fts, fts.c.rowid == model.id) \
+            .filter(literal_column(name).op('MATCH')(' '.join(f'"{w}"*' for w in words))) \
+            .order_by(func.bm25(literal_column(name), *weights), model.id.desc())
+    if visible_only:
+        query = query.filter(source.visible())
+    return query
+
+
+# ── CLI ──
+search_cli = AppGroup('search', help='Index de recherche plein texte.')
+
+
+@search_cli.command('reindex')
+def reindex_command():
+    """Reconstruit l'index de recherche (articles et sujets du forum)."""
+    counts = reindex()
+    db.session.commit()
+    for kind, count in counts.items():
+        click.echo(f'{kind} : {count} ligne(s) indexée(s)')
@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from . import db, page_cache, content, search, counters, freeze
+from .models import Article, Defi, SolidariteAction, ForumTopic, Newsletter
+
+# ── JEU DE DONNÉES VOLUMINEUX ──
+# `flask seed` remplit les tables par INSERT groupés (executemany par lots)
+# pour les benchmarks et tests de charge. Les articles passent par
+# content.prepare() (un rendu par modèle de texte, réutilisé), puis l'index
+# de recherche et les compteurs sont reconstruits en fin de remplissage.
+# Les valeurs suivent un générateur pseudo-aléatoire à graine fixe : deux
+# exécutions avec les mêmes volumes produisent les mêmes données.
+TAGS = ('Foi & Vie', 'Identité', 'Croissance', 'Société', 'Famille', 'Solidarité')
+CATEGORIES = ('Témoignages', 'Questions', 'Entraide', 'Prière', 'Annonces')
+ICONS = ('light', 'hands', 'book', 'heart')
+WORDS = ('influencer autrement choisir chaque jour gestes simples vrais rapprochent gens '
+         'écoute confiance partage lumière chemin espérance communauté force douceur '
+         'engagement fidélité courage joie patience bienveillance').split()
+
+
+def _sentence(rng, length):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _article_bodies(rng, count=8):
+    # Quelques modèles de texte (titres, gras, séparateurs) rendus une seule fois
+    bodies = []
+    for n in range(count):
+        blocks = []
+        for p in range(rng.randint(6, 14)):
+            if p and p % 5 == 0:
+                blocks.append(f'# {_sentence(rng, 4)}')
+            blocks.append(' '.join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 5)))
+                          .replace(' vrais ', ' **vrais** ', 1))
+            if p == 7:
+                blocks.append('---')
+        article = SimpleNamespace(content='\n\n'.join(blocks), excerpt=None)
+        content.prepare(article)
+        bodies.append(article)
+    return bodies
+
+
+def _insert(model, rows_iter, total, batch):
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < total:
+        rows = [next(rows_iter) for _ in range(min(batch, total - inserted))]
+        db.session.execute(model.__table__.insert(), rows)
+        inserted += len(rows)
+    if total:
+        click.echo(f'{model.__tablename__} : {total} ligne(s) en {time.perf_counter() - started:.1f} s')
+
+
+def _dates(rng, now):
+    # Dates étalées sur deux ans, pour des index et une pagination réalistes
+    while True:
+        yield now - timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def seed(articles=0, defis=0, solidarite=0, topics=0, subscribers=0, batch=1000, seed_value=42):
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    dates = _dates(rng, now)
+
+    bodies = _article_bodies(rng) if articles else []
+    start = _next_id(Article)
+
+    def article_rows():
+        for i in range(start, start + articles):
+            body = rng.choice(bodies)
+            created = next(dates)
+            yield {
+                'title': f'{_sentence(rng, 5)[:-1]} #{i}', 'slug': f'seed-article-{i}', 'tag': rng.choice(TAGS),
+                'excerpt': None, 'content': body.content, 'image_url': None,
+                'is_published': rng.random() < 0.9, 'created_at': created, 'updated_at': created,
+                'content_html': body.content_html, 'content_text': body.content_text, 'summary': body.summary,
+                'word_count': body.word_count, 'reading_time': body.reading_time,
+                'render_version': body.render_version,
+            }
+
+    def defi_rows():
+        while True:
+            row = {'title': _sentence(rng, 4)[:-1], 'description': _sentence(rng, 25),
+                   'is_active': rng.random() < 0.3, 'created_at': next(dates), 'link': None, 'image_url': None}
+            for step in (1, 2, 3):
+                row[f'step{step}_title'] = _sentence(rng, 2)[:-1]
+                row[f'step{step}_desc'] = _sentence(rng, 10)
+            yield row
+
+    def solidarite_rows():
+        while True:
+            yield {'title': _sentence(rng, 4)[:-1], 'description': _sentence(rng, 25),
+                   'progress': rng.randint(0, 100), 'icon_type': rng.choice(ICONS),
+                   'is_featured': rng.random() < 0.05, 'is_active': rng.random() < 0.8,
+                   'created_at': next(dates), 'image_url': None}
+
+    def topic_rows():
+        while True:
+            yield {'title': _sentence(rng, 6)[:-1], 'excerpt': _sentence(rng, 20), 'category': rng.choice(CATEGORIES),
+                   'author_name': rng.choice(WORDS).capitalize(), 'is_pinned': rng.random() < 0.01,
+                   'is_hot': rng.random() < 0.05, 'reply_count': rng.randint(0, 200),
+                   'is_visible': rng.random() < 0.95, 'created_at': next(dates)}
+
+    email_start = _next_id(Newsletter)
+
+    def subscriber_rows():
+        for i in range(email_start, email_start + subscribers):
+            yield {'email': f'abonne{i}@seed.test', 'is_active': rng.random() < 0.92, 'created_at': next(dates)}
+
+    _insert(Article, article_rows(), articles, batch)
+    _insert(Defi, defi_rows(), defis, batch)
+    _insert(SolidariteAction, solidarite_rows(), solidarite, batch)
+    _insert(ForumTopic, topic_rows(), topics, batch)
+    _insert(Newsletter, subscriber_rows(), subscribers, batch)
+    db.session.flush()
+    if articles or topics:
+        search.reindex()
+    counters.reconcile()
+    db.session.commit()
+    counters.bump_version()
+    page_cache.clear()
+    if freeze.enabled():
+        freeze.freeze()
+
+
+@click.command('seed')
+@click.option('--articles', type=int, default=1000, show_default=True)
+@click.option('--defis', type=int, default=100, show_default=True)
+@click.option('--solidarite', type=int, default=100, show_default=True)
+@click.option('--topics', type=int, default=1000, show_default=True)
+@click.option('--subscribers', type=int, default=50000, show_default=True)
+@click.option('--batch', type=int, default=1000, show_default=True, help='Lignes par INSERT groupé.')
+@click.option('--seed', 'seed_value', type=int, default=42, show_default=True, help='Graine du générateur.')
+@click.option('--yes', is_flag=True, help='Ne pas demander de confirmation hors SQLite.')
+@with_appcontext
+def seed_command(articles, defis, solidarite, topics, subscribers, batch, seed_value, yes):
+    """Remplit la base de données de test (benchmarks, tests de charge)."""
+    uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite') and not yes:
+        click.confirm(f'Ajouter des données factices à {db.engine.url.render_as_string(hide_password=True)} ?', abort=True)
+    started = time.perf_counter()
+    seed(articles, defis, solidarite, topics, subscribers, batch, seed_value)
+    click.echo(f'Terminé en {time.perf_counter() - started:.1f} s.')
@@ -0,0 +1,86 @@
+/* ── Hamburger menu ── */
+function toggleMenu() {
+  const menu   = document.getElementById('mobile-menu');
+  const burger = document.getElementById('burger');
+  const isOpen = menu.classList.toggle('open');
+  burger.classList.toggle('open', isOpen);
+  document.body.style.overflow = isOpen ? 'hidden' : '';
+}
+function closeMenu() {
+  document.getElementById('mobile-menu').classList.remove('open');
+  document.getElementById('burger').classList.remove('open');
+  document.body.style.overflow = '';
+}
+
+/* ── Fade-up on scroll ── */
+const observer = new IntersectionObserver((entries) => {
+  entries.forEach(e => { if (e.isIntersecting) e.target.classList.add('visible'); });
+}, { threshold: 0.12 });
+document.querySelectorAll('.fade-up').forEach(el => observer.observe(el));
+
+/* ── Nav scroll shadow ── */
+window.addEventListener('scroll', () => {
+  document.getElementById('nav').classList.toggle('scrolled', window.scrollY > 40);
+});
+
+/* ── Modal ── */
+// Le contenu est chargé à l'ouverture (une seule fois par article)
+const articleCache = new Map();
+let modalToken = 0;
+
+function loadArticle(url) {
+  if (!articleCache.has(url)) {
+    const req = fetch(url, { headers: { 'Accept': 'application/json' } })
+      .then(res => { if (!res.ok) throw new Error(res.status); return res.json(); })
+      .catch(err => { articleCache.delete(url); throw err; });
+    articleCache.set(url, req);
+  }
+  return articleCache.get(url);
+}
+
+function openModal(card) {
+  const title = card.getAttribute('data-title');
+  const url   = card.getAttribute('data-url');
+  const cover = card.getAttribute('data-cover');
+  const body  = document.getElementById('modal-body');
+  const token = ++modalToken;
+
+  document.getElementById('modal-title').innerText = title;
+  body.innerHTML = '<p class="pull">Chargement…</p>';
+  loadArticle(url)
+    .then(data => { if (token === modalToken) body.innerHTML = data.html; })
+    .catch(() => { if (token === modalToken) body.innerHTML = '<p>Impossible de charger l\'article.</p>'; });
+
+  // Image de couverture
+  const coverEl  = document.getElementById('modal-cover');
+  const coverImg = document.getElementById('modal-cover-img');
+  if (cover) {
+    coverImg.src = cover;
+    coverImg.alt = title;
+    coverEl.style.display = 'block';
+  } else {
+    coverEl.style.display = 'none';
+  }
+
+  document.getElementById('article-modal').classList.add('open');
+  document.body.style.overflow = 'hidden';
+  document.querySelector('.modal-content').scrollTop = 0;
+}
+function closeModal() {
+  document.getElementById('article-modal').classList.remove('open');
+  document.body.style.overflow = '';
+}
+window.addEventListener('click', (e) => {
+  if (e.target.id === 'article-modal') closeModal();
+});
+document.addEventListener('keydown', (e) => {
+  if (e.key === 'Escape') closeModal();
+});
+
+/* ── Auto-scroll vers #newsletter après soumission ── */
+window.addEventListener('DOMContentLoaded', () => {
+  if (window.location.hash === '#newsletter') {
+    const el = document.getElementById('newsletter');
+    if (el) setTimeout(() => el.scrollIntoView({ behavior: 'smooth' }), 200);
+  }
+});
@@ -0,0 +1,94 @@
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+# ── DIMENSIONNEMENT (gunicorn + pool SQLAlchemy) ──
+# Partagé par gunicorn.conf.py, create_app et `flask pool-check` : tout se
+# règle par variables d'environnement.
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def cpu_count():
+    # CPU réellement disponibles : quota cgroup du conteneur s'il y en a un
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count():
+    default = min(cpu_count() * 2 + 1, _env_int('GUNICORN_MAX_WORKERS', 8))
+    return _env_int('WEB_CONCURRENCY', default)
+
+
+def thread_count():
+    # > 1 : workers gthread (plusieurs requêtes par process, utile pour l'attente DB)
+    return _env_int('GUNICORN_THREADS', 1)
+
+
+def pool_size():
+    # Une connexion par thread de worker au minimum
+    return _env_int('DB_POOL_SIZE', max(2, thread_count()))
+
+
+def max_overflow():
+    return _env_int('DB_MAX_OVERFLOW', 2)
+
+
+def engine_options(uri):
+    if uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': pool_size(),
+        'max_overflow': max_overflow(),
+        # Postgres managé : connexions inactives coupées côté serveur
+        'pool_pre_ping': True,
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+    }
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+    if uri.startswith('postgresql') and statement_timeout:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
+# ── CLI ──
+@click.command('pool-check')
+@click.option('--workers', type=int, default=None, help='Nombre de workers (défaut : celui de gunicorn.conf.py).')
+@click.option('--extra', type=int, default=3, show_default=True,
+              help='Connexions réservées hors web (release, cron, psql…).')
+@with_appcontext
+def pool_check_command(workers, extra):
+    """Vérifie que workers × (pool_size + max_overflow) tient dans max_connections."""
+    from . import db
+    workers = workers or worker_count()
+    options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    per_worker = options.get('pool_size', 0) + options.get('max_overflow', 0)
+    needed = workers * per_worker + extra
+    click.echo(f'{workers} worker(s) × {per_worker} connexion(s) + {extra} = {needed} au maximum')
+    if db.engine.dialect.name != 'postgresql':
+        click.echo(f'{db.engine.dialect.name} : pas de limite de connexions à vérifier.')
+        return
+    with db.engine.connect() as conn:
+        limit = int(conn.exec_driver_sql('SHOW max_connections').scalar())
+        reserved = int(conn.exec_driver_sql('SHOW superuser_reserved_connections').scalar())
+        in_use = conn.exec_driver_sql('SELECT count(*) FROM pg_stat_activity').scalar()
+    available = limit - reserved
+    click.echo(f'Postgres : max_connections={limit}, réservées={reserved}, utilisées actuellement={in_use}')
+    if needed > available:
+        raise click.ClickException(
+            f'{needed} connexions possibles > {available} disponibles : '
+            'réduire WEB_CONCURRENCY, DB_POOL_SIZE ou DB_MAX_OVERFLOW.'
+        )
+    click.echo(f'OK : {available - needed} connexion(s) de marge.')
@@ -0,0 +1,113 @@
+"""Compression des réponses : octets transmis et coût CPU par requête, par encodage.
+
+    python benchmarks/compression.py --requests 200
+    python benchmarks/compression.py --articles 50 --subscribers 20000
+
+Base SQLite temporaire (schéma par `flask release`), peuplée d'articles et
+d'abonnés. Chaque variante enveloppe la même application avec
+CompressionMiddleware ; le CPU est mesuré par time.process_time().
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+VARIANTS = [
+    ('identity', None, {}),
+    ('gzip-1', 'gzip', {'level': 1}),
+    ('gzip-6', 'gzip', {'level': 6}),
+    ('gzip-9', 'gzip', {'level': 9}),
+    ('br-1', 'br', {'br_quality': 1}),
+    ('br-4', 'br', {'br_quality': 4}),
+    ('br-6', 'br', {'br_quality': 6}),
+    ('br-11', 'br', {'br_quality': 11}),
+]
+
+ENDPOINTS = {
+    'accueil': '/',
+    'admin: articles': '/admin/articles?per_page=100',
+    'admin: export CSV (flux)': '/admin/newsletter/export.csv',
+}
+
+
+def make_app(tmp, articles, subscribers):
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+    os.environ['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+    # Le cache de pages est désactivé : chaque requête rend vraiment la page
+    os.environ['PAGE_CACHE_TTL'] = '0'
+    os.environ['COMPRESS_ENABLED'] = '0'
+    from app import create_app, db, content, search, counters
+    from app.models import Article, Newsletter
+    app = create_app()
+    app.test_cli_runner().invoke(args=['release'])
+    with app.app_context():
+        paragraph = ('Influencer autrement, c’est choisir chaque jour des gestes simples et '
+                     '**vrais** qui rapprochent les gens. ') * 6
+        for i in range(articles):
+            art = Article(title=f'Article de test {i}', slug=f'article-de-test-{i}', tag='Société',
+                          content='\n\n'.join([paragraph] * 8), is_published=True)
+            content.prepare(art)
+            db.session.add(art)
+        db.session.execute(Newsletter.__table__.insert(), [
+            {'email': f'abonne{i}@bench.test', 'is_active': True, 'created_at': datetime.utcnow()}
+            for i in range(subscribers)
+        ])
+        db.session.flush()
+        search.reindex()
+        counters.reconcile()
+        db.session.commit()
+    return app
+
+
+def measure(app, inner, variant, path, requests):
+    from app.compress import CompressionMiddleware
+    name, encoding, options = variant
+    app.wsgi_app = CompressionMiddleware(inner, min_size=0, **options) if encoding else inner
+    client = app.test_client()
+    client.post('/admin/login', data={'email': 'admin@influencons.com', 'password': 'changeme123'})
+    headers = {'Accept-Encoding': encoding or 'identity'}
+    # Requêtes de chauffe (templates compilés, caches SQLAlchemy) hors mesure
+    for _ in range(5):
+        client.get(path, headers=headers)
+    wire = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        wire = len(response.get_data())
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    return {
+        'variant': name,
+        'bytes': wire,
+        'cpu_ms_per_request': round(cpu / requests * 1000, 3),
+        'wall_ms_per_request': round(wall / requests * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--articles', type=int, default=30)
+    parser.add_argument('--subscribers', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, args.articles, args.subscribers)
+        inner = app.wsgi_app
+        results = {}
+        for label, path in ENDPOINTS.items():
+            rows = [measure(app, inner, variant, path, args.requests) for variant in VARIANTS]
+            base = rows[0]
+            for row in rows:
+                row['ratio'] = round(base['bytes'] / row['bytes'], 2) if row['bytes'] else None
+                row['cpu_overhead_ms'] = round(row['cpu_ms_per_request'] - base['cpu_ms_per_request'], 3)
+            results[label] = rows
+        print(json.dumps({'requests': args.requests, 'results': results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Test de charge HTTP contre gunicorn : latences p50/p95/p99 et débit par scénario.
+
+    python benchmarks/load.py --duration 10 --concurrency 16
+    python benchmarks/load.py --articles 10000 --subscribers 500000 --workers 4 --output results/load.json
+    python benchmarks/load.py --url http://127.0.0.1:5000 --scenario accueil
+
+Sans --url, une base (SQLite temporaire si DATABASE_URL n'est pas défini) est
+préparée par `flask release` et `flask seed`, puis gunicorn est lancé avec
+gunicorn.conf.py sur un port libre. Chaque scénario envoie des requêtes en
+continu depuis --concurrency threads (connexions keep-alive) pendant
+--duration secondes. Le client tourne dans un seul process : au-delà de
+quelques milliers de req/s, c'est lui qui sature.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import http.client
+import urllib.parse
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# (nom, méthode, chemin, admin)
+SCENARIOS = [
+    ('accueil', 'GET', '/', False),
+    ('newsletter: inscription', 'POST', '/newsletter', False),
+    ('admin: articles', 'GET', '/admin/articles', True),
+    ('admin: newsletter', 'GET', '/admin/newsletter', True),
+    ('admin: forum', 'GET', '/admin/forum', True),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flask(env, *args):
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', *args],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+def start_gunicorn(env, port):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=dict(env, PORT=str(port)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    started = time.perf_counter()
+    while True:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None or time.perf_counter() - started > 60:
+                proc.terminate()
+                raise RuntimeError('gunicorn ne répond pas')
+            time.sleep(0.05)
+
+
+def login(host, port):
+    # Cookie de session admin, partagé par les threads des scénarios admin
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    body = urllib.parse.urlencode({'email': os.environ.get('ADMIN_EMAIL', 'admin@influencons.com'),
+                                   'password': os.environ.get('ADMIN_PASSWORD', 'changeme123')})
+    conn.request('POST', '/admin/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie', '').split(';', 1)[0]
+    conn.close()
+    if response.status != 302 or not cookie:
+        raise RuntimeError('connexion admin impossible (ADMIN_EMAIL / ADMIN_PASSWORD ?)')
+    return cookie
+
+
+def run_scenario(host, port, method, path, headers, concurrency, duration):
+    latencies, statuses, errors = [], {}, []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    run_id = f'{os.getpid()}-{int(time.time())}'
+
+    def worker(n):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local, local_status, i = [], {}, 0
+        while time.perf_counter() < deadline:
+            body = None
+            if method == 'POST':
+                # Adresse unique par requête : chaque inscription écrit vraiment
+                body = urllib.parse.urlencode({'email': f'load{run_id}-{n}-{i}@bench.test'})
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as exc:
+                with lock:
+                    errors.append(type(exc).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            local.append((time.perf_counter() - started) * 1000)
+            local_status[response.status] = local_status.get(response.status, 0) + 1
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            for status, count in local_status.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+        'p50_ms': round(quantiles[49], 2) if latencies else None,
+        'p95_ms': round(quantiles[94], 2) if latencies else None,
+        'p99_ms': round(quantiles[98], 2) if latencies else None,
+        'max_ms': round(max(latencies), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Serveur déjà lancé (pas de préparation de base ni de gunicorn).')
+    parser.add_argument('--scenario', action='append', help='Nom de scénario (répétable) ; défaut : tous.')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2, help='WEB_CONCURRENCY du gunicorn lancé.')
+    parser.add_argument('--threads', type=int, default=1, help='GUNICORN_THREADS du gunicorn lancé.')
+    parser.add_argument('--freeze', action='store_true', help='Pages publiques figées (FREEZE_ENABLED=1).')
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--subscribers', type=int, default=50000)
+    parser.add_argument('--output', help='Fichier JSON de résultats (sinon sortie standard).')
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        if args.url:
+            parsed = urllib.parse.urlsplit(args.url)
+            host, port = parsed.hostname, parsed.port or 80
+        else:
+            env = dict(os.environ)
+            env.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "load.db")}')
+            env['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+            env['NEWSLETTER_RATE_LIMIT'] = '1000000/1'
+            env['WEB_CONCURRENCY'] = str(args.workers)
+            env['GUNICORN_THREADS'] = str(args.threads)
+            env['FREEZE_ENABLED'] = '1' if args.freeze else '0'
+            env['FREEZE_PATH'] = os.path.join(tmp, 'frozen')
+            flask(env, 'release')
+            flask(env, 'seed', '--yes', '--articles', str(args.articles), '--topics', str(args.topics),
+                  '--subscribers', str(args.subscribers))
+            host, port = '127.0.0.1', free_port()
+            proc = start_gunicorn(env, port)
+        try:
+            cookie = login(host, port) if any(s[3] for s in scenarios) else None
+            results = {}
+            for name, method, path, is_admin in scenarios:
+                headers = {'Content-Type': 'application/x-www-form-urlencoded'} if method == 'POST' else {}
+                if is_admin:
+                    headers['Cookie'] = cookie
+                results[name] = run_scenario(host, port, method, path, headers, args.concurrency, args.duration)
+                results[name]['path'] = path
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    report = {
+        'benchmark': 'load',
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'target': args.url or f'gunicorn workers={args.workers} threads={args.threads} freeze={int(args.freeze)}',
+        'duration_s': args.duration,
+        'concurrency': args.concurrency,
+        'dataset': None if args.url else {
+            'articles': args.articles, 'topics': args.topics, 'subscribers': args.subscribers,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
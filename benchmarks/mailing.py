@@ -0,0 +1,147 @@
+"""Envoi d'une campagne vers un serveur SMTP local : débit, connexions ouvertes, échecs.
+
+    python benchmarks/mailing.py --subscribers 5000
+    python benchmarks/mailing.py --subscribers 20000 --connections 8 --rate 0 --latency-ms 5
+    python benchmarks/mailing.py --reject 0.01 --transient 0.02
+
+Le serveur SMTP de test (threads, en mémoire) accepte tout, sauf une part
+--reject de destinataires refusés (550) et une part --transient de messages
+refusés temporairement (451) une première fois. --latency-ms simule le temps
+de réponse d'un vrai relais à la fin de DATA. Base SQLite temporaire.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import tempfile
+import threading
+import socketserver
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, reject, transient, latency):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.reject, self.transient, self.latency = reject, transient, latency
+        self.lock = threading.Lock()
+        self.messages = self.connections = 0
+        self.deferred = set()
+
+    def draw(self, address, rate, salt):
+        # Tirage déterministe par adresse : mêmes échecs d'une exécution à l'autre
+        return rate and zlib.crc32(f'{salt}{address}'.encode()) % 10000 < rate * 10000
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 sink ESMTP')
+        rcpt = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].upper()
+            if verb in (b'EHLO', b'HELO'):
+                self.reply('250 sink')
+            elif verb == b'MAIL':
+                self.reply('250 OK')
+            elif verb == b'RCPT':
+                rcpt = line.split(b':', 1)[1].strip(b' <>\r\n').decode()
+                self.reply('550 Unknown user' if server.draw(rcpt, server.reject, 'r') else '250 OK')
+            elif verb == b'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                if server.latency:
+                    time.sleep(server.latency)
+                with server.lock:
+                    defer = server.draw(rcpt, server.transient, 't') and rcpt not in server.deferred
+                    if defer:
+                        server.deferred.add(rcpt)
+                    else:
+                        server.messages += 1
+                self.reply('451 Try again later' if defer else '250 Queued')
+            elif verb == b'RSET' or verb == b'NOOP':
+                self.reply('250 OK')
+            elif verb == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+def make_app(tmp, subscribers, port, args):
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+    os.environ['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+    os.environ.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=str(port), MAIL_SECURITY='',
+                      MAIL_CONNECTIONS=str(args.connections), MAIL_RATE=str(args.rate),
+                      MAIL_BATCH_SIZE=str(args.batch))
+    from app import create_app, db
+    from app.models import Newsletter
+    app = create_app()
+    app.test_cli_runner().invoke(args=['release'])
+    with app.app_context():
+        db.session.execute(Newsletter.__table__.insert(), [
+            {'email': f'abonne{i}@bench.test', 'is_active': True, 'created_at': datetime.utcnow()}
+            for i in range(subscribers)
+        ])
+        db.session.commit()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='MAIL_RATE (0 = sans limite).')
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=2)
+    parser.add_argument('--reject', type=float, default=0.0)
+    parser.add_argument('--transient', type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.reject, args.transient, args.latency_ms / 1000)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, args.subscribers, sink.server_address[1], args)
+        from app import db, mailing
+        from app.models import Campaign
+        with app.app_context():
+            campaign = Campaign(subject='Lettre de test', body='Bonjour,\n\nUn **message** de test.\n\n---\n\nÀ bientôt !')
+            db.session.add(campaign)
+            db.session.commit()
+            mailing.claim(campaign.id)
+            db.session.refresh(campaign)
+            started = time.perf_counter()
+            mailing.send_campaign(campaign)
+            elapsed = time.perf_counter() - started
+            result = {
+                'subscribers': args.subscribers,
+                'connections_config': args.connections,
+                'status': campaign.status,
+                'sent': campaign.sent_count,
+                'failed': campaign.failed_count,
+                'received': sink.messages,
+                'smtp_connections_opened': sink.connections,
+                'seconds': round(elapsed, 2),
+                'messages_per_minute': round(campaign.sent_count / elapsed * 60),
+            }
+    sink.shutdown()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Rafale d'inscriptions newsletter : débit direct vs tamponné, et coût d'un rejet.
+
+    python benchmarks/newsletter_burst.py --requests 2000 --threads 8
+    DATABASE_URL=postgresql://... python benchmarks/newsletter_burst.py
+
+Sans DATABASE_URL, une base SQLite temporaire est utilisée.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_app(tmp, buffered):
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+    os.environ['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+    os.environ['NEWSLETTER_RATE_LIMIT'] = '1000000/1'
+    os.environ['NEWSLETTER_BUFFERED'] = '1' if buffered else '0'
+    from app import create_app, db
+    from app.models import Newsletter
+    app = create_app()
+    app.test_cli_runner().invoke(args=['release'])
+    with app.app_context():
+        Newsletter.query.delete()
+        db.session.commit()
+    return app
+
+
+def burst(app, total, threads, prefix):
+    errors = []
+
+    def worker(n):
+        client = app.test_client()
+        for i in range(n, total, threads):
+            r = client.post('/newsletter', data={'email': f'{prefix}{i}@bench.test'},
+                            environ_base={'REMOTE_ADDR': f'10.0.{i % 250}.{n}'})
+            if r.status_code != 302:
+                errors.append(r.status_code)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - started, len(errors)
+
+
+def wait_rows(app, expected, timeout=60):
+    from app.models import Newsletter
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with app.app_context():
+            count = Newsletter.query.count()
+        if count >= expected:
+            return count
+        time.sleep(0.1)
+    return count
+
+
+def flood(app, total):
+    # Une seule IP : tout est rejeté par le seau à jetons après la capacité initiale
+    from app.ratelimit import TokenBucket
+    app.extensions['newsletter_limiter'] = TokenBucket(5, 60)
+    client = app.test_client()
+    started = time.perf_counter()
+    rejected = sum(
+        client.post('/newsletter', data={'email': f'flood{i}@bench.test'},
+                    environ_base={'REMOTE_ADDR': '10.9.9.9'}).status_code == 429
+        for i in range(total)
+    )
+    return time.perf_counter() - started, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, buffered=False)
+        elapsed, errors = burst(app, args.requests, args.threads, 'direct')
+        results['direct'] = {'seconds': round(elapsed, 3), 'req_per_s': round(args.requests / elapsed, 1),
+                             'errors': errors}
+
+        app = make_app(tmp, buffered=True)
+        elapsed, errors = burst(app, args.requests, args.threads, 'buffered')
+        rows = wait_rows(app, args.requests)
+        results['buffered'] = {'seconds': round(elapsed, 3), 'req_per_s': round(args.requests / elapsed, 1),
+                               'errors': errors, 'rows_written': rows}
+
+        elapsed, rejected = flood(app, args.requests)
+        results['rate_limited'] = {'seconds': round(elapsed, 3), 'req_per_s': round(args.requests / elapsed, 1),
+                                   'rejected': rejected}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
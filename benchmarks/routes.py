@@ -0,0 +1,166 @@
+"""Micro-benchmarks des routes via le client de test Flask (sans serveur HTTP).
+
+    python benchmarks/routes.py --requests 50
+    python benchmarks/routes.py --articles 10000 --subscribers 500000 --output results/routes.json
+    DATABASE_URL=postgresql://... python benchmarks/routes.py --no-seed
+
+Sans DATABASE_URL, une base SQLite temporaire est créée (`flask release`) puis
+remplie par `flask seed`. Le cache de pages est désactivé sauf --page-cache ;
+l'instrumentation (METRICS_ENABLED) fournit le nombre de requêtes SQL par route.
+Résultat en JSON, à comparer d'une exécution à l'autre. Chaque route a un budget
+de requêtes SQL : un dépassement (chargement paresseux, N+1…) est signalé et le
+script sort en erreur.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# (nom, méthode, chemin, admin, budget SQL) ; {slug} est remplacé par un article publié
+ROUTES = [
+    ('accueil', 'GET', '/', False, 4),
+    ('api: article', 'GET', '/api/articles/{slug}', False, 2),
+    ('api: recherche', 'GET', '/api/search?q=lumi', False, 2),
+    ('newsletter: inscription', 'POST', '/newsletter', False, 2),
+    ('admin: tableau de bord', 'GET', '/admin/', True, 5),
+    ('admin: articles', 'GET', '/admin/articles', True, 1),
+    ('admin: articles (recherche)', 'GET', '/admin/articles?q=courage', True, 1),
+    ('admin: défis', 'GET', '/admin/defis', True, 1),
+    ('admin: solidarité', 'GET', '/admin/solidarite', True, 1),
+    ('admin: forum', 'GET', '/admin/forum', True, 1),
+    ('admin: newsletter', 'GET', '/admin/newsletter', True, 2),
+]
+
+SQL_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) SQL"')
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_app(tmp, args):
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+    os.environ['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+    if not args.page_cache:
+        os.environ['PAGE_CACHE_TTL'] = '0'
+    os.environ['METRICS_ENABLED'] = '1'
+    os.environ['NEWSLETTER_RATE_LIMIT'] = '1000000/1'
+    from app import create_app
+    app = create_app()
+    runner = app.test_cli_runner()
+    runner.invoke(args=['release'])
+    if not args.no_seed:
+        result = runner.invoke(args=[
+            'seed', '--yes', '--articles', str(args.articles), '--topics', str(args.topics),
+            '--subscribers', str(args.subscribers), '--defis', str(args.defis), '--solidarite', str(args.solidarite),
+        ])
+        if result.exit_code:
+            raise RuntimeError(result.output)
+    return app
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1] if len(samples) > 1 else samples[0]
+
+
+def measure(client, method, path, requests, form=None):
+    samples, sql_ms, queries, status = [], [], [], None
+    for i in range(requests + 5):
+        data = form(i) if form else None
+        started = time.perf_counter()
+        response = client.open(path, method=method, data=data)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        # Cinq requêtes de chauffe hors mesure
+        if i < 5:
+            continue
+        samples.append(elapsed * 1000)
+        status = response.status_code
+        timing = SQL_TIMING.search(response.headers.get('Server-Timing', ''))
+        if timing:
+            sql_ms.append(float(timing.group(1)))
+            queries.append(int(timing.group(2)))
+    return {
+        'status': status,
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'max_ms': round(max(samples), 3),
+        'sql_queries': max(queries) if queries else None,
+        'sql_ms': round(statistics.fmean(sql_ms), 3) if sql_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--defis', type=int, default=200)
+    parser.add_argument('--solidarite', type=int, default=200)
+    parser.add_argument('--subscribers', type=int, default=50000)
+    parser.add_argument('--no-seed', action='store_true', help='Base déjà remplie (DATABASE_URL).')
+    parser.add_argument('--page-cache', action='store_true', help="Garder le cache de pages de l'accueil.")
+    parser.add_argument('--output', help='Fichier JSON de résultats (sinon sortie standard).')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, args)
+        from app.models import Article
+        with app.app_context():
+            slug = Article.query.filter_by(is_published=True).order_by(Article.id).first().slug
+        admin = app.test_client()
+        admin.post('/admin/login', data={'email': os.environ.get('ADMIN_EMAIL', 'admin@influencons.com'),
+                                         'password': os.environ.get('ADMIN_PASSWORD', 'changeme123')})
+        public = app.test_client()
+        stamp = int(time.time())
+        results = {}
+        for name, method, path, is_admin, budget in ROUTES:
+            form = (lambda i: {'email': f'bench{stamp}-{i}@bench.test'}) if method == 'POST' else None
+            results[name] = measure(admin if is_admin else public, method, path.format(slug=slug),
+                                    args.requests, form)
+            results[name].update(path=path, sql_budget=budget)
+
+    report = {
+        'benchmark': 'routes',
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+        'requests': args.requests,
+        'dataset': None if args.no_seed else {
+            'articles': args.articles, 'topics': args.topics, 'defis': args.defis,
+            'solidarite': args.solidarite, 'subscribers': args.subscribers,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+    over = [f"{name} : {r['sql_queries']} requêtes SQL (budget {r['sql_budget']})"
+            for name, r in results.items() if (r['sql_queries'] or 0) > r['sql_budget']]
+    if over:
+        print('Budget SQL dépassé :\n  ' + '\n  '.join(over), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
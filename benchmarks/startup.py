@@ -0,0 +1,95 @@
+"""Temps de démarrage : import de wsgi:app puis première requête servie.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --gunicorn --workers 4
+
+Chaque mesure se fait dans un process neuf. La base (SQLite temporaire si
+DATABASE_URL n'est pas défini) est préparée une fois par `flask release`,
+hors chronomètre.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Process enfant : import + première requête via le client de test
+PROBE = """
+import time, json
+t0 = time.perf_counter()
+from wsgi import app
+t1 = time.perf_counter()
+status = app.test_client().get('/').status_code
+t2 = time.perf_counter()
+print(json.dumps({'import_s': t1 - t0, 'first_request_s': t2 - t1, 'total_s': t2 - t0, 'status': status}))
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def in_process(env, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: round(statistics.median(s[key] for s in samples), 4)
+            for key in ('import_s', 'first_request_s', 'total_s')}
+
+
+def with_gunicorn(env, runs, workers):
+    samples = []
+    for _ in range(runs):
+        port = free_port()
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}', 'wsgi:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1) as r:
+                        if r.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.01)
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError('gunicorn ne répond pas')
+            samples.append(time.perf_counter() - started)
+        finally:
+            proc.terminate()
+            proc.wait()
+    return {'time_to_first_request_s': round(statistics.median(samples), 4), 'workers': workers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true', help='Mesurer avec un vrai serveur gunicorn.')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "startup.db")}')
+        env['PAGE_CACHE_PATH'] = os.path.join(tmp, 'page_cache.sqlite3')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', 'release'],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+        result = with_gunicorn(env, args.runs, args.workers) if args.gunicorn else in_process(env, args.runs)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import os
+from app.tuning import worker_count, thread_count
+
+# ── GUNICORN (production) ──
+# Tout se règle par variables d'environnement : WEB_CONCURRENCY, GUNICORN_THREADS,
+# GUNICORN_MAX_WORKERS, GUNICORN_TIMEOUT. Voir aussi `flask pool-check`.
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+
+workers = worker_count()
+threads = thread_count()
+# Plusieurs threads par worker : gthread (attente DB sans bloquer le process)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Application chargée une fois dans le master puis partagée par fork
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recyclage des workers pour borner la mémoire (Pillow, caches en process)
+max_requests = 1000
+max_requests_jitter = 100
+
+# Le proxy de Render est le seul client direct
+forwarded_allow_ips = '*'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Pas de connexion héritée du master : chaque worker ouvre son propre pool
+    from app import db
+    from wsgi import app
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,127 @@
+"""initial schema
+
+Revision ID: 3f1c2a9b7d10
+Revises: 
+Create Date: 2026-10-18 10:00:00
+
+Schéma tel que créé jusqu'ici par db.create_all(). Sur une base existante,
+seules les tables et colonnes manquantes sont ajoutées.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=256), nullable=False),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+    if 'articles' not in tables:
+        op.create_table(
+            'articles',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('slug', sa.String(length=200), nullable=False),
+            sa.Column('tag', sa.String(length=80), nullable=True),
+            sa.Column('excerpt', sa.Text(), nullable=True),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('image_url', sa.String(length=300), nullable=True),
+            sa.Column('is_published', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('slug'),
+        )
+    if 'defis' not in tables:
+        op.create_table(
+            'defis',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('step1_title', sa.String(length=100), nullable=True),
+            sa.Column('step1_desc', sa.String(length=200), nullable=True),
+            sa.Column('step2_title', sa.String(length=100), nullable=True),
+            sa.Column('step2_desc', sa.String(length=200), nullable=True),
+            sa.Column('step3_title', sa.String(length=100), nullable=True),
+            sa.Column('step3_desc', sa.String(length=200), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('link', sa.String(length=255), nullable=True),
+            sa.Column('image_url', sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if 'solidarite_action' not in tables:
+        op.create_table(
+            'solidarite_action',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('progress', sa.Integer(), nullable=True),
+            sa.Column('icon_type', sa.String(length=20), nullable=True),
+            sa.Column('is_featured', sa.Boolean(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('image_url', sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if 'forum_topics' not in tables:
+        op.create_table(
+            'forum_topics',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('excerpt', sa.Text(), nullable=True),
+            sa.Column('category', sa.String(length=50), nullable=True),
+            sa.Column('author_name', sa.String(length=80), nullable=True),
+            sa.Column('is_pinned', sa.Boolean(), nullable=True),
+            sa.Column('is_hot', sa.Boolean(), nullable=True),
+            sa.Column('reply_count', sa.Integer(), nullable=True),
+            sa.Column('is_visible', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if 'newsletter' not in tables:
+        op.create_table(
+            'newsletter',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+
+    # Colonnes ajoutées après coup (anciennement des ALTER TABLE au démarrage)
+    late_columns = {
+        'defis': ('link', 'image_url'),
+        'solidarite_action': ('image_url',),
+    }
+    for table, columns in late_columns.items():
+        if table not in tables:
+            continue
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        for column in columns:
+            if column not in existing:
+                op.add_column(table, sa.Column(column, sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    for table in ('newsletter', 'forum_topics', 'solidarite_action', 'defis', 'articles', 'users'):
+        op.drop_table(table)
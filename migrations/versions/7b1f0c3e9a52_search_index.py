@@ -0,0 +1,60 @@
+"""search index
+
+Revision ID: 7b1f0c3e9a52
+Revises: e5b3a8c46f21
+Create Date: 2026-10-18 13:00:00
+
+Recherche plein texte sur articles et forum_topics. Postgres : colonne
+search_vector (tsvector, configuration french) remplie puis indexée en GIN.
+SQLite : tables virtuelles FTS5 articles_fts / forum_topics_fts.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7b1f0c3e9a52'
+down_revision = 'e5b3a8c46f21'
+branch_labels = None
+depends_on = None
+
+# Mêmes colonnes et poids que app/search.py
+SOURCES = {
+    'articles': (('title', 'A'), ('tag', 'B'), ('excerpt', 'C'), ('content', 'D')),
+    'forum_topics': (('title', 'A'), ('category', 'B'), ('excerpt', 'C')),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for tablename, fields in SOURCES.items():
+            op.add_column(tablename, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+            vector = ' || '.join(
+                f"setweight(to_tsvector('french', coalesce({name}, '')), '{weight}')"
+                for name, weight in fields
+            )
+            op.execute(f'UPDATE {tablename} SET search_vector = {vector}')
+        with op.get_context().autocommit_block():
+            for tablename in SOURCES:
+                op.create_index(f'ix_{tablename}_search', tablename, ['search_vector'],
+                                postgresql_using='gin', postgresql_concurrently=True)
+        op.execute('ANALYZE')
+    else:
+        for tablename, fields in SOURCES.items():
+            names = ', '.join(name for name, _ in fields)
+            op.execute(
+                f"CREATE VIRTUAL TABLE {tablename}_fts USING fts5("
+                f"{names}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            op.execute(f'INSERT INTO {tablename}_fts (rowid, {names}) SELECT id, {names} FROM {tablename}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for tablename in SOURCES:
+            op.drop_index(f'ix_{tablename}_search', table_name=tablename)
+            op.drop_column(tablename, 'search_vector')
+    else:
+        for tablename in SOURCES:
+            op.execute(f'DROP TABLE {tablename}_fts')
@@ -0,0 +1,50 @@
+"""hot query indexes
+
+Revision ID: 8a4e6d2c1b95
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 10:30:00
+
+Index composites correspondant aux requêtes de l'accueil, du tableau de
+bord et des listes admin (pagination par (created_at, id)).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c1b95'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_articles_published_created', 'articles', ['is_published', 'created_at']),
+    ('ix_articles_created_id', 'articles', ['created_at', 'id']),
+    ('ix_defis_active_created', 'defis', ['is_active', 'created_at']),
+    ('ix_defis_created_id', 'defis', ['created_at', 'id']),
+    ('ix_solidarite_action_active_featured', 'solidarite_action', ['is_active', 'is_featured']),
+    ('ix_solidarite_action_created_id', 'solidarite_action', ['created_at', 'id']),
+    ('ix_forum_topics_created_id', 'forum_topics', ['created_at', 'id']),
+    ('ix_newsletter_active_created', 'newsletter', ['is_active', 'created_at']),
+    ('ix_newsletter_created_id', 'newsletter', ['created_at', 'id']),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    missing = [
+        (name, table, columns) for name, table, columns in INDEXES
+        # Déjà présent si la table a été créée par db.create_all()
+        if name not in {ix['name'] for ix in inspector.get_indexes(table)}
+    ]
+    # CONCURRENTLY sur Postgres : pas de verrou d'écriture pendant la création
+    with op.get_context().autocommit_block():
+        for name, table, columns in missing:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+    # Statistiques à jour pour que le planificateur choisisse les nouveaux index
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,61 @@
+"""article rendering
+
+Revision ID: a4c9e2f7d813
+Revises: 7b1f0c3e9a52
+Create Date: 2026-10-18 14:00:00
+
+Colonnes calculées à l'enregistrement (content.prepare) : HTML assaini,
+texte brut, résumé, nombre de mots, temps de lecture. Colonnes seulement
+(render_version NULL) : les articles existants sont rendus par `flask release`
+(content.render_articles), pas ici, pour que rejouer l'historique ne dépende
+pas du code de rendu actuel. L'index de recherche porte désormais sur le
+texte brut et est reconstruit après ce rendu.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e2f7d813'
+down_revision = '7b1f0c3e9a52'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    sa.Column('content_html', sa.Text(), nullable=True),
+    sa.Column('content_text', sa.Text(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('word_count', sa.Integer(), nullable=True),
+    sa.Column('reading_time', sa.Integer(), nullable=True),
+    sa.Column('render_version', sa.Integer(), nullable=True),
+)
+
+SEARCH_FIELDS = (('title', 'A'), ('tag', 'B'), ('excerpt', 'C'), ('{content}', 'D'))
+
+
+def _search_index(content_column):
+    fields = [(name.format(content=content_column), weight) for name, weight in SEARCH_FIELDS]
+    if op.get_bind().dialect.name == 'postgresql':
+        vector = ' || '.join(
+            f"setweight(to_tsvector('french', coalesce({name}, '')), '{weight}')" for name, weight in fields
+        )
+        op.execute(f'UPDATE articles SET search_vector = {vector}')
+    else:
+        names = ', '.join(name for name, _ in fields)
+        op.execute('DROP TABLE articles_fts')
+        op.execute(f"CREATE VIRTUAL TABLE articles_fts USING fts5({names}, tokenize = 'unicode61 remove_diacritics 2')")
+        op.execute(f'INSERT INTO articles_fts (rowid, {names}) SELECT id, {names} FROM articles')
+
+
+def upgrade():
+    with op.batch_alter_table('articles') as batch:
+        for column in COLUMNS:
+            batch.add_column(column.copy())
+    _search_index('content_text')
+
+
+def downgrade():
+    _search_index('content')
+    with op.batch_alter_table('articles') as batch:
+        for column in reversed(COLUMNS):
+            batch.drop_column(column.name)
@@ -0,0 +1,45 @@
+"""dashboard counters
+
+Revision ID: c2d7e91f4a03
+Revises: 8a4e6d2c1b95
+Create Date: 2026-10-18 11:00:00
+
+Table counters (statistiques du tableau de bord), initialisée par comptage.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d7e91f4a03'
+down_revision = '8a4e6d2c1b95'
+branch_labels = None
+depends_on = None
+
+COUNTS = {
+    'articles': 'SELECT COUNT(*) FROM articles',
+    'defis': 'SELECT COUNT(*) FROM defis',
+    'solidarite': 'SELECT COUNT(*) FROM solidarite_action',
+    'topics': 'SELECT COUNT(*) FROM forum_topics',
+    'subscribers': 'SELECT COUNT(*) FROM newsletter WHERE is_active',
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'counters' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'counters',
+            sa.Column('name', sa.String(length=40), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+    counters = sa.table('counters', sa.column('name'), sa.column('value'))
+    op.execute(counters.delete())
+    op.bulk_insert(counters, [
+        {'name': name, 'value': bind.execute(sa.text(sql)).scalar()} for name, sql in COUNTS.items()
+    ])
+
+
+def downgrade():
+    op.drop_table('counters')
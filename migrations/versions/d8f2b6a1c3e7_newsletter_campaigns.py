@@ -0,0 +1,52 @@
+"""newsletter campaigns
+
+Revision ID: d8f2b6a1c3e7
+Revises: a4c9e2f7d813
+Create Date: 2026-10-18 18:00:00
+
+Campagnes d'envoi de la newsletter (progression, reprise) et destinataires
+en échec.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b6a1c3e7'
+down_revision = 'a4c9e2f7d813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(length=200), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('cursor', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'campaign_failures',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('error', sa.String(length=300), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_campaign_failures_campaign_id', 'campaign_failures', ['campaign_id'])
+
+
+def downgrade():
+    op.drop_index('ix_campaign_failures_campaign_id', table_name='campaign_failures')
+    op.drop_table('campaign_failures')
+    op.drop_table('campaigns')
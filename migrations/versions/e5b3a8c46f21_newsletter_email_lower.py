@@ -0,0 +1,44 @@
+"""newsletter email lower
+
+Revision ID: e5b3a8c46f21
+Revises: c2d7e91f4a03
+Create Date: 2026-10-18 11:30:00
+
+Adresses newsletter normalisées (minuscules, sans espaces) : les doublons
+de casse sont fusionnés (ligne la plus ancienne conservée, active si l'une
+l'était), puis index unique sur lower(email).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b3a8c46f21'
+down_revision = 'c2d7e91f4a03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE newsletter SET is_active = TRUE
+        WHERE lower(trim(email)) IN (
+            SELECT lower(trim(email)) FROM newsletter WHERE is_active GROUP BY lower(trim(email))
+        )
+    """)
+    op.execute("""
+        DELETE FROM newsletter
+        WHERE id NOT IN (SELECT MIN(id) FROM newsletter GROUP BY lower(trim(email)))
+    """)
+    op.execute("UPDATE newsletter SET email = lower(trim(email)) WHERE email <> lower(trim(email))")
+    op.execute("""
+        UPDATE counters SET value = (SELECT COUNT(*) FROM newsletter WHERE is_active)
+        WHERE name = 'subscribers'
+    """)
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('newsletter')}
+    if 'uq_newsletter_email_lower' not in existing:
+        op.create_index('uq_newsletter_email_lower', 'newsletter', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_newsletter_email_lower', table_name='newsletter')
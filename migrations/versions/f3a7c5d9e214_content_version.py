@@ -0,0 +1,29 @@
+"""content version
+
+Revision ID: f3a7c5d9e214
+Revises: d8f2b6a1c3e7
+Create Date: 2026-10-18 21:00:00
+
+Version du contenu public (ETag de l'accueil et de la recherche) tenue dans
+counters, commune à tous les hôtes.
+"""
+import time
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c5d9e214'
+down_revision = 'd8f2b6a1c3e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    counters = sa.table('counters', sa.column('name'), sa.column('value'))
+    op.bulk_insert(counters, [{'name': 'content_version', 'value': int(time.time())}])
+
+
+def downgrade():
+    counters = sa.table('counters', sa.column('name'), sa.column('value'))
+    op.execute(counters.delete().where(counters.c.name == 'content_version'))